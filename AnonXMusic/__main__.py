@@ -7,13 +7,19 @@ from pytgcalls.exceptions import NoActiveGroupCall
 import config
 from AnonXMusic import LOGGER, app, userbot
 from AnonXMusic.core.call import Anony
+from AnonXMusic.core.http import http
 from AnonXMusic.misc import sudo
 from AnonXMusic.plugins import ALL_MODULES
 from AnonXMusic.utils.database import get_banned_users, get_gbanned
+from AnonXMusic.utils import render
+from AnonXMusic.utils.checkpoint import resume, start_checkpoints, stop_checkpoints
+from AnonXMusic.utils.mediacache import media_cache
+from AnonXMusic.utils.thumbnails import thumb_cache
 from config import BANNED_USERS
 
 
 async def init():
+    render.start()
     if (
         not config.STRING1
         and not config.STRING2
@@ -24,6 +30,8 @@ async def init():
         LOGGER(__name__).error("Assistant client variables not defined, exiting...")
         exit()
     await sudo()
+    media_cache.load()
+    thumb_cache.load()
     try:
         users = await get_gbanned()
         for user_id in users:
@@ -33,6 +41,7 @@ async def init():
             BANNED_USERS.add(user_id)
     except:
         pass
+    await http.start()
     await app.start()
     for all_module in ALL_MODULES:
         importlib.import_module("AnonXMusic.plugins" + all_module)
@@ -49,10 +58,17 @@ async def init():
     except:
         pass
     await Anony.decorators()
+    start_checkpoints()
+    asyncio.ensure_future(resume())
     LOGGER("AnonXMusic").info(
         "\x41\x6e\x6f\x6e\x58\x20\x4d\x75\x73\x69\x63\x20\x42\x6f\x74\x20\x53\x74\x61\x72\x74\x65\x64\x20\x53\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x6c\x79\x2e\n\n\x44\x6f\x6e'\x74\x20\x66\x6f\x72\x67\x65\x74\x20\x74\x6f\x20\x76\x69\x73\x69\x74\x20\x40\x46\x61\x6c\x6c\x65\x6e\x41\x73\x73\x6f\x63\x69\x61\x74\x69\x6f\x6e"
     )
     await idle()
+    await stop_checkpoints()
+    media_cache.save()
+    thumb_cache.save()
+    await http.stop()
+    render.shutdown()
     await app.stop()
     await userbot.stop()
     LOGGER("AnonXMusic").info("Stopping AnonX Music Bot...")
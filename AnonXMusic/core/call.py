@@ -18,10 +18,13 @@ from pytgcalls.types.stream import StreamAudioEnded
 
 import config
 from AnonXMusic import LOGGER, YouTube, app
+from AnonXMusic.core.queue import ChatQueue
 from AnonXMusic.misc import db
+from AnonXMusic.utils.bars import watch_player
 from AnonXMusic.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    delete_queue,
     get_lang,
     get_loop,
     group_assistant,
@@ -31,10 +34,25 @@ from AnonXMusic.utils.database import (
     remove_active_video_chat,
     set_loop,
 )
+from AnonXMusic.utils.downloads import fallback, wait
 from AnonXMusic.utils.exceptions import AssistantErr
-from AnonXMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
+from AnonXMusic.utils.fileids import send_photo
+from AnonXMusic.utils.formatters import check_duration, seconds_to_min
 from AnonXMusic.utils.inline.play import stream_markup
-from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.playback import (
+    get_played,
+    pause_track,
+    resume_track,
+    speed_position,
+    start_track,
+)
+from AnonXMusic.utils.stream.autoclear import (
+    auto_clean,
+    clean_queue,
+    pin,
+    swap_file,
+)
+from AnonXMusic.utils.tgstream import complete, playable
 from AnonXMusic.utils.thumbnails import get_thumb
 from strings import get_string
 
@@ -43,7 +61,9 @@ counter = {}
 
 
 async def _clear_(chat_id):
-    db[chat_id] = []
+    await clean_queue(db.get(chat_id))
+    await delete_queue(chat_id)
+    db[chat_id] = ChatQueue()
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
 
@@ -104,10 +124,14 @@ class Call(PyTgCalls):
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         await assistant.pause_stream(chat_id)
+        if db.get(chat_id):
+            pause_track(db[chat_id][0])
 
     async def resume_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         await assistant.resume_stream(chat_id)
+        if db.get(chat_id):
+            resume_track(db[chat_id][0])
 
     async def stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -150,6 +174,7 @@ class Call(PyTgCalls):
 
     async def speedup_stream(self, chat_id: int, file_path, speed, playing):
         assistant = await group_assistant(self, chat_id)
+        await complete(file_path)
         if str(speed) != str("1.0"):
             base = os.path.basename(file_path)
             chatdir = os.path.join(os.getcwd(), "playback", str(speed))
@@ -186,7 +211,8 @@ class Call(PyTgCalls):
             out = file_path
         dur = await asyncio.get_event_loop().run_in_executor(None, check_duration, out)
         dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
+        con_seconds = speed_position(playing[0], speed)
+        played = seconds_to_min(con_seconds)
         duration = seconds_to_min(dur)
         stream = (
             AudioVideoPiped(
@@ -211,17 +237,17 @@ class Call(PyTgCalls):
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
-            db[chat_id][0]["played"] = con_seconds
             db[chat_id][0]["dur"] = duration
             db[chat_id][0]["seconds"] = dur
             db[chat_id][0]["speed_path"] = out
             db[chat_id][0]["speed"] = speed
+            start_track(db[chat_id][0], con_seconds)
 
     async def force_stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         try:
             check = db.get(chat_id)
-            check.pop(0)
+            await auto_clean(check.advance())
         except:
             pass
         await remove_active_video_chat(chat_id)
@@ -241,19 +267,72 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         if video:
             stream = AudioVideoPiped(
-                link,
+                await playable(link),
                 audio_parameters=HighQualityAudio(),
                 video_parameters=MediumQualityVideo(),
             )
         else:
-            stream = AudioPiped(link, audio_parameters=HighQualityAudio())
-        await assistant.change_stream(
-            chat_id,
-            stream,
+            stream = AudioPiped(
+                await playable(link), audio_parameters=HighQualityAudio()
+            )
+        try:
+            await assistant.change_stream(
+                chat_id,
+                stream,
+            )
+        except Exception:
+            if not await self.fallback_stream(assistant, chat_id, link, video):
+                raise
+
+    def local_stream(self, file_path, video, additional_ffmpeg_parameters=""):
+        if video:
+            return AudioVideoPiped(
+                file_path,
+                audio_parameters=HighQualityAudio(),
+                video_parameters=MediumQualityVideo(),
+                additional_ffmpeg_parameters=additional_ffmpeg_parameters,
+            )
+        return AudioPiped(
+            file_path,
+            audio_parameters=HighQualityAudio(),
+            additional_ffmpeg_parameters=additional_ffmpeg_parameters,
         )
 
+    async def fallback_stream(self, client, chat_id, link, video) -> bool:
+        """Switches a failed remote stream over to its downloaded copy."""
+        file_path = await fallback(link)
+        if not file_path:
+            return False
+        try:
+            await client.change_stream(chat_id, self.local_stream(file_path, video))
+        except Exception:
+            return False
+        return True
+
+    async def recover_stream(self, client, chat_id, track) -> bool:
+        """Continues a remote stream which ended early from its downloaded copy."""
+        if config.STREAM_MODE != "direct" or "vid_" not in track["file"]:
+            return False
+        played = get_played(track)
+        if int(track["seconds"]) - played <= 15:
+            return False
+        video = str(track["streamtype"]) == "video"
+        file_path = await wait(YouTube.path(track["vidid"], video))
+        if not file_path:
+            return False
+        stream = self.local_stream(
+            file_path, video, f"-ss {seconds_to_min(played)} -to {track['dur']}"
+        )
+        try:
+            await client.change_stream(chat_id, stream)
+        except Exception:
+            return False
+        swap_file(track, file_path)
+        return True
+
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
+        file_path = await complete(file_path)
         stream = (
             AudioVideoPiped(
                 file_path,
@@ -287,26 +366,15 @@ class Call(PyTgCalls):
         link,
         video: Union[bool, str] = None,
         image: Union[bool, str] = None,
+        seek: int = 0,
     ):
         assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
-        if video:
-            stream = AudioVideoPiped(
-                link,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-            )
-        else:
-            stream = (
-                AudioVideoPiped(
-                    link,
-                    audio_parameters=HighQualityAudio(),
-                    video_parameters=MediumQualityVideo(),
-                )
-                if video
-                else AudioPiped(link, audio_parameters=HighQualityAudio())
-            )
+        link = await playable(link)
+        # a resumed call starts where its checkpoint left off
+        params = f"-ss {int(seek)}" if seek else ""
+        stream = self.local_stream(link, video, params)
         try:
             await assistant.join_group_call(
                 chat_id,
@@ -319,6 +387,15 @@ class Call(PyTgCalls):
             raise AssistantErr(_["call_9"])
         except TelegramServerError:
             raise AssistantErr(_["call_10"])
+        except Exception:
+            file_path = await fallback(link)
+            if not file_path:
+                raise
+            await assistant.join_group_call(
+                chat_id,
+                self.local_stream(file_path, video, params),
+                stream_type=StreamType().pulse_stream,
+            )
         await add_active_chat(chat_id)
         await music_on(chat_id)
         if video:
@@ -332,10 +409,12 @@ class Call(PyTgCalls):
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
         popped = None
+        if check and await self.recover_stream(client, chat_id, check[0]):
+            return
         loop = await get_loop(chat_id)
         try:
             if loop == 0:
-                popped = check.pop(0)
+                popped = check.advance()
             else:
                 loop = loop - 1
                 await set_loop(chat_id, loop)
@@ -358,13 +437,13 @@ class Call(PyTgCalls):
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
             videoid = check[0]["vidid"]
-            db[chat_id][0]["played"] = 0
             exis = (check[0]).get("old_dur")
             if exis:
                 db[chat_id][0]["dur"] = exis
                 db[chat_id][0]["seconds"] = check[0]["old_second"]
                 db[chat_id][0]["speed_path"] = None
                 db[chat_id][0]["speed"] = 1.0
+            start_track(db[chat_id][0])
             video = True if str(streamtype) == "video" else False
             if "live_" in queued:
                 n, link = await YouTube.video(videoid, True)
@@ -393,7 +472,7 @@ class Call(PyTgCalls):
                     )
                 img = await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                run = await app.send_photo(
+                run = await send_photo(
                     chat_id=original_chat_id,
                     photo=img,
                     caption=_["stream_1"].format(
@@ -404,8 +483,9 @@ class Call(PyTgCalls):
                     ),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "tg"
+                watch_player(chat_id, run, _)
             elif "vid_" in queued:
                 mystic = await app.send_message(original_chat_id, _["call_7"])
                 try:
@@ -414,11 +494,16 @@ class Call(PyTgCalls):
                         mystic,
                         videoid=True,
                         video=True if str(streamtype) == "video" else False,
+                        _=_,
                     )
                 except:
                     return await mystic.edit_text(
                         _["call_6"], disable_web_page_preview=True
                     )
+                if direct:
+                    swap_file(check[0], file_path)
+                else:
+                    pin(check[0], YouTube.path(videoid, video))
                 if video:
                     stream = AudioVideoPiped(
                         file_path,
@@ -433,14 +518,17 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
-                    return await app.send_message(
-                        original_chat_id,
-                        text=_["call_6"],
-                    )
+                    if not await self.fallback_stream(
+                        client, chat_id, file_path, video
+                    ):
+                        return await app.send_message(
+                            original_chat_id,
+                            text=_["call_6"],
+                        )
                 img = await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
                 await mystic.delete()
-                run = await app.send_photo(
+                run = await send_photo(
                     chat_id=original_chat_id,
                     photo=img,
                     caption=_["stream_1"].format(
@@ -451,8 +539,9 @@ class Call(PyTgCalls):
                     ),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "stream"
+                watch_player(chat_id, run, _)
             elif "index_" in queued:
                 stream = (
                     AudioVideoPiped(
@@ -471,24 +560,25 @@ class Call(PyTgCalls):
                         text=_["call_6"],
                     )
                 button = stream_markup(_, chat_id)
-                run = await app.send_photo(
+                run = await send_photo(
                     chat_id=original_chat_id,
                     photo=config.STREAM_IMG_URL,
                     caption=_["stream_2"].format(user),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "tg"
+                watch_player(chat_id, run, _)
             else:
                 if video:
                     stream = AudioVideoPiped(
-                        queued,
+                        await playable(queued),
                         audio_parameters=HighQualityAudio(),
                         video_parameters=MediumQualityVideo(),
                     )
                 else:
                     stream = AudioPiped(
-                        queued,
+                        await playable(queued),
                         audio_parameters=HighQualityAudio(),
                     )
                 try:
@@ -500,7 +590,7 @@ class Call(PyTgCalls):
                     )
                 if videoid == "telegram":
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await send_photo(
                         chat_id=original_chat_id,
                         photo=config.TELEGRAM_AUDIO_URL
                         if str(streamtype) == "audio"
@@ -510,11 +600,12 @@ class Call(PyTgCalls):
                         ),
                         reply_markup=InlineKeyboardMarkup(button),
                     )
-                    db[chat_id][0]["mystic"] = run
+                    db[chat_id][0]["mystic"] = run.id
                     db[chat_id][0]["markup"] = "tg"
+                    watch_player(chat_id, run, _)
                 elif videoid == "soundcloud":
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await send_photo(
                         chat_id=original_chat_id,
                         photo=config.SOUNCLOUD_IMG_URL,
                         caption=_["stream_1"].format(
@@ -522,12 +613,13 @@ class Call(PyTgCalls):
                         ),
                         reply_markup=InlineKeyboardMarkup(button),
                     )
-                    db[chat_id][0]["mystic"] = run
+                    db[chat_id][0]["mystic"] = run.id
                     db[chat_id][0]["markup"] = "tg"
+                    watch_player(chat_id, run, _)
                 else:
                     img = await get_thumb(videoid)
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await send_photo(
                         chat_id=original_chat_id,
                         photo=img,
                         caption=_["stream_1"].format(
@@ -538,8 +630,9 @@ class Call(PyTgCalls):
                         ),
                         reply_markup=InlineKeyboardMarkup(button),
                     )
-                    db[chat_id][0]["mystic"] = run
+                    db[chat_id][0]["mystic"] = run.id
                     db[chat_id][0]["markup"] = "stream"
+                    watch_player(chat_id, run, _)
 
     async def ping(self):
         pings = []
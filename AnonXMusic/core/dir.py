@@ -16,5 +16,7 @@ def dirr():
         os.mkdir("downloads")
     if "cache" not in os.listdir():
         os.mkdir("cache")
+    if "thumbs" not in os.listdir():
+        os.mkdir("thumbs")
 
     LOGGER(__name__).info("Directories Updated.")
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from ..logging import LOGGER
+
+# responses worth asking again for, the body of anything else is returned as is
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+
+class HTTPClient:
+    """One pooled aiohttp session shared by every outbound request of the bot.
+
+    Connections are kept alive and reused per host, DNS lookups are cached
+    and failed requests are retried with a growing delay. Connection errors
+    are retried for every method, timeouts and 5xx/429 responses only for
+    idempotent ones.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_ttl: int = 300,
+        timeout: int = 20,
+        retries: int = 2,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _new(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=10),
+        )
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            self._session = self._new()
+        LOGGER(__name__).info("HTTP client started.")
+
+    async def stop(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # opened on first use as well, for requests made before start()
+        if self._session is None or self._session.closed:
+            self._session = self._new()
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retries: int = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> aiohttp.ClientResponse:
+        """Performs a request and returns the response with its body already read.
+
+        The connection goes straight back to the pool, `json()`, `text()`
+        and `read()` of the returned response work from memory. With `stream`
+        the body is left unread for the caller to consume, who then has to
+        release the response, `async with resp:` does.
+        """
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            delay = 2**attempt
+            try:
+                resp = await self.session.request(method, url, **kwargs)
+                if not stream:
+                    try:
+                        await resp.read()
+                    finally:
+                        resp.release()
+            except aiohttp.ClientConnectorError:
+                if attempt == retries:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == retries or method not in IDEMPOTENT:
+                    raise
+            else:
+                if (
+                    resp.status not in RETRY_STATUS
+                    or attempt == retries
+                    or (method not in IDEMPOTENT and resp.status != 429)
+                ):
+                    return resp
+                resp.release()
+                try:
+                    delay = max(delay, int(resp.headers.get("Retry-After", 0)))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("POST", url, **kwargs)
+
+
+http = HTTPClient()
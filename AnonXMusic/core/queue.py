@@ -0,0 +1,154 @@
+import random
+from collections import deque
+from typing import Iterable, List
+
+
+class Track:
+    """A queued track in a fixed set of slots.
+
+    Reads and writes like the dict it replaces, `track["title"]` and
+    `track.get("old_dur")` keep working, but only the fields below exist.
+    A field which was never set reads as None.
+    """
+
+    __slots__ = (
+        "title",
+        "dur",
+        "streamtype",
+        "by",
+        "user_id",
+        "chat_id",
+        "file",
+        "vidid",
+        "seconds",
+        # playback clock, see utils/playback.py
+        "started",
+        "position",
+        "paused_at",
+        "paused_for",
+        "speed",
+        "speed_path",
+        "old_dur",
+        "old_second",
+        # background download kept while the remote stream plays
+        "pinned",
+        # id of the now playing message and the markup it shows
+        "mystic",
+        "markup",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise KeyError(", ".join(fields))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        }
+
+
+class ChatQueue(deque):
+    """The tracks of a chat, the first one is playing.
+
+    Taking the playing track off and putting one in front are O(1). Every
+    change moves `version`, snapshot() copies the queue once per version.
+    The list methods the plugins use (append, insert, pop(0), [0]) keep
+    working.
+    """
+
+    def __init__(self, tracks: Iterable[Track] = (), maxlen=None):
+        self.version = 0
+        self._snapshot = None
+        super().__init__(tracks, maxlen)
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+
+    def append(self, track: Track):
+        super().append(track)
+        self._changed()
+
+    def extend(self, tracks: Iterable[Track]):
+        super().extend(tracks)
+        self._changed()
+
+    def push_front(self, track: Track):
+        self.appendleft(track)
+        self._changed()
+
+    def insert(self, index: int, track: Track):
+        super().insert(index, track)
+        self._changed()
+
+    def advance(self) -> Track:
+        """Takes the playing track off, raises IndexError on an empty queue."""
+        track = self.popleft()
+        self._changed()
+        return track
+
+    def pop(self, index: int = -1) -> Track:
+        if index == 0:
+            return self.advance()
+        if index == -1:
+            track = super().pop()
+        else:
+            track = self[index]
+            del self[index]
+        self._changed()
+        return track
+
+    def remove(self, track: Track):
+        super().remove(track)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def skip_n(self, n: int) -> List[Track]:
+        """Takes up to `n` tracks off the front and returns them."""
+        skipped = [self.popleft() for _ in range(min(n, len(self)))]
+        self._changed()
+        return skipped
+
+    def shuffle_tail(self) -> bool:
+        """Shuffles everything after the playing track, False if there is nothing to shuffle."""
+        if len(self) < 2:
+            return False
+        tail = list(self)[1:]
+        random.shuffle(tail)
+        head = self[0]
+        super().clear()
+        self.extend(tail)
+        self.appendleft(head)
+        self._changed()
+        return True
+
+    def snapshot(self) -> tuple:
+        if self._snapshot is None:
+            self._snapshot = tuple(self)
+        return self._snapshot
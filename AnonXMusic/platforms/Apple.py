@@ -1,9 +1,8 @@
 import re
 from typing import Union
 
-import aiohttp
-from bs4 import BeautifulSoup
-from youtubesearchpython.__future__ import VideosSearch
+from AnonXMusic.platforms.Youtube import resolve
+from AnonXMusic.utils.metatags import fetch_meta
 
 
 class AppleAPI:
@@ -20,52 +19,33 @@ class AppleAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        search = None
-        for tag in soup.find_all("meta"):
-            if tag.get("property", None) == "og:title":
-                search = tag.get("content", None)
-        if search is None:
-            return False
-        results = VideosSearch(search, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+        match = re.search(r"[?&]i=(\d+)", url)
+        key = match.group(1) if match else url.split("?")[0]
+
+        async def info():
+            meta = await fetch_meta(url)
+            if not meta:
+                raise ValueError("Apple Music page could not be fetched")
+            search = meta.get("og:title", [None])[-1]
+            if search is None:
+                raise ValueError("No title found on the Apple Music page")
+            return search
+
+        track_details = await resolve(info, "apple", key)
+        return track_details, track_details["vidid"]
 
     async def playlist(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
         playlist_id = url.split("playlist/")[1]
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        applelinks = soup.find_all("meta", attrs={"property": "music:song"})
+        meta = await fetch_meta(url)
+        if meta is None:
+            return False
         results = []
-        for item in applelinks:
+        for item in meta.get("music:song", []):
             try:
-                xx = (((item["content"]).split("album/")[1]).split("/")[0]).replace(
-                    "-", " "
-                )
+                xx = ((item.split("album/")[1]).split("/")[0]).replace("-", " ")
             except:
-                xx = ((item["content"]).split("album/")[1]).split("/")[0]
+                xx = (item.split("album/")[1]).split("/")[0]
             results.append(xx)
         return results, playlist_id
@@ -1,46 +1,16 @@
-import random
+import hashlib
+import os
 from os.path import realpath
 
-import aiohttp
-from aiohttp import client_exceptions
+from PIL import Image, ImageDraw
+
+from AnonXMusic.utils.render import font, render
 
 
 class UnableToFetchCarbon(Exception):
     pass
 
 
-themes = [
-    "3024-night",
-    "a11y-dark",
-    "blackboard",
-    "base16-dark",
-    "base16-light",
-    "cobalt",
-    "duotone-dark",
-    "dracula-pro",
-    "hopscotch",
-    "lucario",
-    "material",
-    "monokai",
-    "nightowl",
-    "nord",
-    "oceanic-next",
-    "one-light",
-    "one-dark",
-    "panda-syntax",
-    "parasio-dark",
-    "seti",
-    "shades-of-purple",
-    "solarized+dark",
-    "solarized+light",
-    "synthwave-84",
-    "twilight",
-    "verminal",
-    "vscode",
-    "yeti",
-    "zenburn",
-]
-
 colour = [
     "#FF0000",
     "#FF5733",
@@ -67,40 +37,65 @@ colour = [
 ]
 
 
+def draw_card(text: str, path: str, background: str) -> str:
+    """Draws `text` on a dark editor-like card, runs in the render pool."""
+    body = font("font", 28)
+    lines = text.splitlines() or [""]
+    line_height = body.getbbox("Ag")[3] + 12
+    width = max([600] + [int(body.getlength(line)) for line in lines])
+    pad, margin, bar = 40, 60, 30
+    card_w = width + 2 * pad
+    card_h = line_height * len(lines) + 2 * pad + bar
+    image = Image.new("RGB", (card_w + 2 * margin, card_h + 2 * margin), background)
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle(
+        [(margin, margin), (margin + card_w, margin + card_h)],
+        radius=16,
+        fill="#1e1e2e",
+    )
+    for i, button in enumerate(("#ff5f56", "#ffbd2e", "#27c93f")):
+        x = margin + pad + i * 26
+        draw.ellipse([(x, margin + 20), (x + 14, margin + 34)], fill=button)
+    y = margin + pad + bar
+    for line in lines:
+        draw.text((margin + pad, y), line, fill="#cdd6f4", font=body)
+        y += line_height
+    image.save(path, "JPEG", quality=85, optimize=True)
+    return path
+
+
 class CarbonAPI:
     def __init__(self):
-        self.language = "auto"
-        self.drop_shadow = True
-        self.drop_shadow_blur = "68px"
-        self.drop_shadow_offset = "20px"
-        self.font_family = "JetBrains Mono"
-        self.width_adjustment = True
-        self.watermark = False
+        self.path = "cache"
+        # rendered cards kept on disk, the oldest are removed first
+        self.limit = 50
 
-    async def generate(self, text: str, user_id):
-        async with aiohttp.ClientSession(
-            headers={"Content-Type": "application/json"},
-        ) as ses:
-            params = {
-                "code": text,
-            }
-            params["backgroundColor"] = random.choice(colour)
-            params["theme"] = random.choice(themes)
-            params["dropShadow"] = self.drop_shadow
-            params["dropShadowOffsetY"] = self.drop_shadow_offset
-            params["dropShadowBlurRadius"] = self.drop_shadow_blur
-            params["fontFamily"] = self.font_family
-            params["language"] = self.language
-            params["watermark"] = self.watermark
-            params["widthAdjustment"] = self.width_adjustment
+    def _prune(self):
+        cards = [
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path)
+            if name.startswith("carbon_")
+        ]
+        if len(cards) <= self.limit:
+            return
+        cards.sort(key=os.path.getmtime)
+        for card in cards[: len(cards) - self.limit]:
             try:
-                request = await ses.post(
-                    "https://carbonara.solopov.dev/api/cook",
-                    json=params,
-                )
-            except client_exceptions.ClientConnectorError:
-                raise UnableToFetchCarbon("Can not reach the Host!")
-            resp = await request.read()
-            with open(f"cache/carbon{user_id}.jpg", "wb") as f:
-                f.write(resp)
-            return realpath(f.name)
+                os.remove(card)
+            except OSError:
+                pass
+
+    async def generate(self, text: str, user_id=None):
+        """Renders a queue summary locally, identical texts share one image."""
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        path = os.path.join(self.path, f"carbon_{digest[:20]}.jpg")
+        if os.path.isfile(path):
+            os.utime(path)
+            return realpath(path)
+        background = colour[int(digest, 16) % len(colour)]
+        try:
+            await render(draw_card, text, path, background)
+        except Exception as e:
+            raise UnableToFetchCarbon(f"Can not render the card : {e}")
+        self._prune()
+        return realpath(path)
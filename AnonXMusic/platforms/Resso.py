@@ -1,9 +1,8 @@
 import re
 from typing import Union
 
-import aiohttp
-from bs4 import BeautifulSoup
-from youtubesearchpython.__future__ import VideosSearch
+from AnonXMusic.platforms.Youtube import resolve
+from AnonXMusic.utils.metatags import fetch_meta
 
 
 class RessoAPI:
@@ -20,35 +19,18 @@ class RessoAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup.find_all("meta"):
-            if tag.get("property", None) == "og:title":
-                title = tag.get("content", None)
-            if tag.get("property", None) == "og:description":
-                des = tag.get("content", None)
-                try:
-                    des = des.split("·")[0]
-                except:
-                    pass
-        if des == "":
-            return
-        results = VideosSearch(title, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+
+        async def info():
+            meta = await fetch_meta(url)
+            if not meta:
+                raise ValueError("Resso page could not be fetched")
+            title = meta.get("og:title", [None])[-1]
+            des = meta.get("og:description", [None])[-1]
+            if des is not None:
+                des = des.split("·")[0]
+            if not title or des == "":
+                raise ValueError("No track found on the Resso page")
+            return title
+
+        track_details = await resolve(info, "resso", url.split("?")[0])
+        return track_details, track_details["vidid"]
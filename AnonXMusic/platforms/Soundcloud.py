@@ -1,19 +1,24 @@
+import asyncio
 from os import path
 
 from yt_dlp import YoutubeDL
 
+from AnonXMusic.utils.downloads import fetch, ytdl
 from AnonXMusic.utils.formatters import seconds_to_min
+from AnonXMusic.utils.ttlcache import TTLCache
 
 
 class SoundAPI:
     def __init__(self):
+        self.format = "bestaudio[ext=mp3]/bestaudio[acodec=opus]/bestaudio/best"
         self.opts = {
-            "outtmpl": "downloads/%(id)s.%(ext)s",
-            "format": "best",
-            "retries": 3,
-            "nooverwrites": False,
-            "continuedl": True,
+            "format": self.format,
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
         }
+        # url -> track details, so a known track needs no extraction at all
+        self.tracks = TTLCache(86400, maxsize=1000)
 
     async def valid(self, link: str):
         if "soundcloud" in link:
@@ -21,19 +26,38 @@ class SoundAPI:
         else:
             return False
 
-    async def download(self, url):
-        d = YoutubeDL(self.opts)
-        try:
-            info = d.extract_info(url)
-        except:
-            return False
-        xyz = path.join("downloads", f"{info['id']}.{info['ext']}")
-        duration_min = seconds_to_min(info["duration"])
-        track_details = {
+    def path(self, track_id, ext: str) -> str:
+        return path.join("downloads", f"soundcloud_{track_id}.{ext}")
+
+    async def info(self, url) -> dict:
+        """Resolves the metadata of a track without downloading it."""
+
+        def extract():
+            with YoutubeDL(self.opts) as ydl:
+                return ydl.extract_info(url, download=False)
+
+        info = await asyncio.get_running_loop().run_in_executor(None, extract)
+        xyz = self.path(info["id"], info["ext"])
+        return {
             "title": info["title"],
             "duration_sec": info["duration"],
-            "duration_min": duration_min,
+            "duration_min": seconds_to_min(info["duration"]),
             "uploader": info["uploader"],
             "filepath": xyz,
         }
+
+    async def download(self, url):
+        track_details = self.tracks.get(url)
+        try:
+            if track_details is None:
+                track_details = await self.info(url)
+                self.tracks.set(url, track_details)
+
+            async def worker(temp):
+                await ytdl(url, temp, self.format)
+
+            # returns straight away when the file is already in the media cache
+            xyz = await fetch(track_details["filepath"], worker)
+        except:
+            return False
         return track_details, xyz
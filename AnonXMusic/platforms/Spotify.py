@@ -1,10 +1,16 @@
+import asyncio
 import re
+import time
+from typing import AsyncIterator, List, Tuple
 
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from youtubesearchpython.__future__ import VideosSearch
+import aiohttp
 
 import config
+from AnonXMusic.core.http import http
+from AnonXMusic.platforms.Youtube import resolve
+
+API_URL = "https://api.spotify.com/v1"
+TOKEN_URL = "https://accounts.spotify.com/api/token"
 
 
 class SpotifyAPI:
@@ -12,15 +18,9 @@ class SpotifyAPI:
         self.regex = r"^(https:\/\/open.spotify.com\/)(.*)$"
         self.client_id = config.SPOTIFY_CLIENT_ID
         self.client_secret = config.SPOTIFY_CLIENT_SECRET
-        if config.SPOTIFY_CLIENT_ID and config.SPOTIFY_CLIENT_SECRET:
-            self.client_credentials_manager = SpotifyClientCredentials(
-                self.client_id, self.client_secret
-            )
-            self.spotify = spotipy.Spotify(
-                client_credentials_manager=self.client_credentials_manager
-            )
-        else:
-            self.spotify = None
+        self.token = None
+        self.expires = 0
+        self.token_lock = asyncio.Lock()
 
     async def valid(self, link: str):
         if re.search(self.regex, link):
@@ -28,71 +28,111 @@ class SpotifyAPI:
         else:
             return False
 
-    async def track(self, link: str):
-        track = self.spotify.track(link)
+    async def _token(self) -> str:
+        """Returns a client credentials token, requesting one only when expired."""
+        async with self.token_lock:
+            if self.token and time.time() < self.expires - 60:
+                return self.token
+            resp = await http.post(
+                TOKEN_URL,
+                data={"grant_type": "client_credentials"},
+                auth=aiohttp.BasicAuth(self.client_id, self.client_secret),
+            )
+            resp.raise_for_status()
+            data = await resp.json()
+            self.token = data["access_token"]
+            self.expires = time.time() + data.get("expires_in", 3600)
+            return self.token
+
+    async def _get(self, path: str, **params) -> dict:
+        for attempt in range(2):
+            token = await self._token()
+            resp = await http.get(
+                f"{API_URL}/{path}",
+                params=params,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if resp.status == 401:
+                self.token = None
+                continue
+            resp.raise_for_status()
+            return await resp.json()
+        raise aiohttp.ClientError(f"Spotify request failed : {path}")
+
+    @staticmethod
+    def _id(link: str) -> str:
+        """Accepts an open.spotify.com link or a bare id."""
+        return link.split("?")[0].rstrip("/").split("/")[-1]
+
+    @staticmethod
+    def _info(track: dict) -> str:
         info = track["name"]
         for artist in track["artists"]:
             fetched = f' {artist["name"]}'
             if "Various Artists" not in fetched:
                 info += fetched
-        results = VideosSearch(info, limit=1)
-        for result in (await results.next())["result"]:
-            ytlink = result["link"]
-            title = result["title"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
-
-    async def playlist(self, url):
-        playlist = self.spotify.playlist(url)
-        playlist_id = playlist["id"]
-        results = []
-        for item in playlist["tracks"]["items"]:
-            music_track = item["track"]
-            info = music_track["name"]
-            for artist in music_track["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
-        return results, playlist_id
-
-    async def album(self, url):
-        album = self.spotify.album(url)
-        album_id = album["id"]
-        results = []
-        for item in album["tracks"]["items"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
-
-        return (
-            results,
-            album_id,
+        return info
+
+    async def _pages(
+        self, first: dict, path: str, limit: int, key=None
+    ) -> AsyncIterator[str]:
+        """Yields the tracks of a paged listing, fetching the remaining pages concurrently.
+
+        Only the pages needed for PLAYLIST_FETCH_LIMIT tracks are requested
+        and tracks of the first page are yielded before the others arrive.
+        """
+        end = min(first["total"], config.PLAYLIST_FETCH_LIMIT)
+        tasks = [
+            asyncio.ensure_future(self._get(path, offset=offset, limit=limit))
+            for offset in range(first["offset"] + len(first["items"]), end, limit)
+        ]
+        try:
+            pages = [first] + tasks
+            for page in pages:
+                if not isinstance(page, dict):
+                    try:
+                        page = await page
+                    except Exception:
+                        break
+                for item in page["items"]:
+                    track = key(item) if key else item
+                    if track and track.get("name"):
+                        yield self._info(track)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def track(self, link: str):
+        track_id = self._id(link)
+
+        async def info():
+            return self._info(await self._get(f"tracks/{track_id}"))
+
+        track_details = await resolve(info, "spotify", track_id)
+        return track_details, track_details["vidid"]
+
+    async def playlist(self, url) -> Tuple[AsyncIterator[str], str]:
+        playlist_id = self._id(url)
+        playlist = await self._get(f"playlists/{playlist_id}")
+        results = self._pages(
+            playlist["tracks"],
+            f"playlists/{playlist_id}/tracks",
+            100,
+            key=lambda item: item.get("track"),
         )
+        return results, playlist["id"]
 
-    async def artist(self, url):
-        artistinfo = self.spotify.artist(url)
-        artist_id = artistinfo["id"]
-        results = []
-        artisttoptracks = self.spotify.artist_top_tracks(url)
-        for item in artisttoptracks["tracks"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+    async def album(self, url) -> Tuple[AsyncIterator[str], str]:
+        album_id = self._id(url)
+        album = await self._get(f"albums/{album_id}")
+        results = self._pages(album["tracks"], f"albums/{album_id}/tracks", 50)
+        return results, album["id"]
 
+    async def artist(self, url) -> Tuple[List[str], str]:
+        artist_id = self._id(url)
+        artisttoptracks = await self._get(
+            f"artists/{artist_id}/top-tracks", market="US"
+        )
+        results = [self._info(item) for item in artisttoptracks["tracks"]]
         return results, artist_id
+
@@ -7,12 +7,28 @@ from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Voice
 
 import config
 from AnonXMusic import app
+from AnonXMusic.utils import tgstream
 from AnonXMusic.utils.formatters import (
     check_duration,
-    convert_bytes,
     get_readable_time,
     seconds_to_min,
 )
+from AnonXMusic.utils.mediacache import media_cache
+from AnonXMusic.utils.progress import ProgressReporter
+from AnonXMusic.utils.tgdownload import parallel_download
+
+
+def cancel_markup() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    text="ᴄᴀɴᴄᴇʟ",
+                    callback_data="stop_downloading",
+                ),
+            ]
+        ]
+    )
 
 
 class TeleAPI:
@@ -91,79 +107,60 @@ class TeleAPI:
             file_name = os.path.join(os.path.realpath("downloads"), file_name)
         return file_name
 
+    async def stream(self, _, message, mystic, fname):
+        """Starts receiving the media and returns once enough of it is buffered to play."""
+        media = message.reply_to_message
+        file = media.audio or media.voice or media.video or media.document
+        progress = ProgressReporter(mystic, _, cancel_markup())
+        transfer = tgstream.start(media, fname, file.file_size, progress)
+        task = asyncio.create_task(transfer.buffered(config.TG_STREAM_BUFFER))
+        config.lyrical[mystic.id] = task
+        try:
+            ok = await task
+        except asyncio.CancelledError:
+            ok = False
+        # the rest arrives while playing, the message is gone by then
+        progress.close()
+        if not config.lyrical.pop(mystic.id, None):
+            # other chats may be waiting for or playing the same transfer
+            transfer.leave()
+            return False
+        if not ok:
+            await mystic.edit_text(_["tg_3"])
+        return ok
+
     async def download(self, _, message, mystic, fname):
-        lower = [0, 8, 17, 38, 64, 77, 96]
-        higher = [5, 10, 20, 40, 66, 80, 99]
-        checker = [5, 10, 20, 40, 66, 80, 99]
         speed_counter = {}
-        if os.path.exists(fname):
+        if media_cache.lookup(fname) or os.path.exists(fname):
             return True
+        if config.STREAM_MODE == "direct":
+            return await self.stream(_, message, mystic, fname)
 
         async def down_load():
-            async def progress(current, total):
-                if current == total:
-                    return
-                current_time = time.time()
-                start_time = speed_counter.get(message.id)
-                check_time = current_time - start_time
-                upl = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                text="ᴄᴀɴᴄᴇʟ",
-                                callback_data="stop_downloading",
-                            ),
-                        ]
-                    ]
-                )
-                percentage = current * 100 / total
-                percentage = str(round(percentage, 2))
-                speed = current / check_time
-                eta = int((total - current) / speed)
-                eta = get_readable_time(eta)
-                if not eta:
-                    eta = "0 sᴇᴄᴏɴᴅs"
-                total_size = convert_bytes(total)
-                completed_size = convert_bytes(current)
-                speed = convert_bytes(speed)
-                percentage = int((percentage.split("."))[0])
-                for counter in range(7):
-                    low = int(lower[counter])
-                    high = int(higher[counter])
-                    check = int(checker[counter])
-                    if low < percentage <= high:
-                        if high == check:
-                            try:
-                                await mystic.edit_text(
-                                    text=_["tg_1"].format(
-                                        app.mention,
-                                        total_size,
-                                        completed_size,
-                                        percentage[:5],
-                                        speed,
-                                        eta,
-                                    ),
-                                    reply_markup=upl,
-                                )
-                                checker[counter] = 100
-                            except:
-                                pass
+            progress = ProgressReporter(mystic, _, cancel_markup())
 
             speed_counter[message.id] = time.time()
+            media = message.reply_to_message
+            file = media.audio or media.voice or media.video or media.document
             try:
-                await app.download_media(
-                    message.reply_to_message,
-                    file_name=fname,
-                    progress=progress,
-                )
+                if file.file_size >= config.TG_PARALLEL_MIN_SIZE:
+                    await parallel_download(media, fname, file.file_size, progress)
+                else:
+                    await app.download_media(
+                        media,
+                        file_name=fname,
+                        progress=progress,
+                    )
                 try:
                     elapsed = get_readable_time(
                         int(int(time.time()) - int(speed_counter[message.id]))
                     )
                 except:
                     elapsed = "0 sᴇᴄᴏɴᴅs"
+                progress.close()
                 await mystic.edit_text(_["tg_2"].format(elapsed))
             except:
+                progress.close()
                 await mystic.edit_text(_["tg_3"])
 
         task = asyncio.create_task(down_load())
@@ -173,4 +170,6 @@ class TeleAPI:
         if not verify:
             return False
         config.lyrical.pop(mystic.id)
+        if os.path.isfile(fname):
+            media_cache.add(fname)
         return True
@@ -1,15 +1,21 @@
 import asyncio
 import os
 import re
-from typing import Union, List, Tuple, Dict
+from typing import Awaitable, Callable, Union, List, Tuple, Dict
 
 import yt_dlp
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 from youtubesearchpython.__future__ import VideosSearch
 
-from AnonXMusic.utils.database import is_on_off
+import config
+from AnonXMusic.utils.database import get_ytmap, is_on_off, save_ytmap
+from AnonXMusic.utils.downloads import add_remote, fetch, ytdl
 from AnonXMusic.utils.formatters import time_to_seconds
+from AnonXMusic.utils.progress import ProgressReporter
+from AnonXMusic.utils.stream.autoclear import release, retain
+from AnonXMusic.utils.ttlcache import TTLCache
+
 
 async def shell_cmd(cmd: str) -> str:
     """Runs a shell command and returns its output. Handles errors."""
@@ -32,6 +38,37 @@ async def shell_cmd(cmd: str) -> str:
         print(f"Exception running shell command: {e}")
         return str(e)
 
+
+async def resolve(
+    query: Union[str, Callable[[], Awaitable[str]]],
+    platform: str = "search",
+    key: str = None,
+) -> Dict[str, str]:
+    """Maps a track of another platform to a YouTube video.
+
+    The mapping is stored per (platform, key), `key` defaulting to the query
+    itself, so a known track never searches YouTube again. `query` may be a
+    coroutine function, it is only called on a cache miss.
+    """
+    key = key or query
+    details = await get_ytmap(platform, key)
+    if details:
+        return details
+    if callable(query):
+        query = await query()
+    results = VideosSearch(query, limit=1)
+    result = (await results.next())["result"][0]
+    details = {
+        "title": result["title"],
+        "link": result["link"],
+        "vidid": result["id"],
+        "duration_min": result["duration"],
+        "thumb": result["thumbnails"][0]["url"].split("?")[0],
+    }
+    await save_ytmap(platform, key, details)
+    return details
+
+
 class YouTubeAPI:
     def __init__(self):
         self.base = "https://www.youtube.com/watch?v="
@@ -39,6 +76,23 @@ class YouTubeAPI:
         self.status = "https://www.youtube.com/oembed?url="
         self.listbase = "https://youtube.com/playlist?list="
         self.reg = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+        # format selectors tried left to right, per kind of stream, each one
+        # stored as is in the container path() names, so audio stays mp4 family
+        self.format_policy = {
+            "audio": "bestaudio[ext=m4a]/bestaudio[acodec^=mp4a]/best[ext=mp4]",
+            "video": (
+                "bestvideo[height<=?720][width<=?1280]+bestaudio"
+                "/best[height<=?720][width<=?1280][ext=mp4]/best[ext=mp4]"
+            ),
+        }
+        self.containers = {"audio": "m4a", "video": "mp4"}
+        # (query, user) -> search results browsed with the slider buttons
+        self.searches = TTLCache(300)
+        # single url formats which ffmpeg can play straight from youtube
+        self.remote_policy = {
+            "audio": "bestaudio[ext=m4a]/bestaudio/best",
+            "video": "best[height<=?720][width<=?1280]/best",
+        }
 
     async def exists(self, link: str, videoid: Union[bool, str] = None) -> bool:
         """Checks if a YouTube link exists."""
@@ -123,8 +177,13 @@ class YouTubeAPI:
             print(f"Error fetching thumbnail: {e}")
             return None
 
-    async def video(self, link: str, videoid: Union[bool, str] = None) -> Tuple[int, Union[str, None]]:
-        """Fetches the video URL."""
+    async def video(
+        self,
+        link: str,
+        videoid: Union[bool, str] = None,
+        fmt: str = "best[height<=?720][width<=?1280]",
+    ) -> Tuple[int, Union[str, None]]:
+        """Fetches the media URL of a video for the given format."""
         if videoid:
             link = self.base + link
         if "&" in link:
@@ -134,7 +193,7 @@ class YouTubeAPI:
                 "yt-dlp",
                 "-g",
                 "-f",
-                "best[height<=?720][width<=?1280]",
+                fmt,
                 f"{link}",
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
@@ -200,7 +259,9 @@ class YouTubeAPI:
             ydl = yt_dlp.YoutubeDL(ydl_opts)
             with ydl:
                 formats_available = []
-                r = ydl.extract_info(link, download=False)
+                r = await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: ydl.extract_info(link, download=False)
+                )
                 for format in r["formats"]:
                     if "dash" in str(format["format"]).lower():
                         continue
@@ -225,63 +286,88 @@ class YouTubeAPI:
     async def slider(
         self,
         link: str,
-        query_type: str,
-        download: bool,
-        format_id: Union[str, None] = None,
-    ) -> Tuple[Union[str, None], Union[str, None]]:
-        """Handles downloading and streaming of videos."""
-        try:
-            video_id = link
-            if query_type == "video":
-                ytlink = f"https://youtu.be/{video_id}"
-            elif query_type == "playlist":
-                ytlink = f"https://youtube.com/playlist?list={video_id}"
-            elif query_type == "url":
-                ytlink = link
-            else:
-                return None, "Invalid query type"
+        query_type: int,
+        user_id: Union[int, str] = None,
+    ) -> Tuple[str, str, str, str]:
+        """Returns result number `query_type` of a search, searching once per query and user.
 
-            if download:
-                command = f"yt-dlp -f {format_id} {ytlink} --quiet --no-warnings --no-progress"
-                output = await shell_cmd(command)
-                return output, None
-            else:
-                output, _ = await self.video(link)
-                if output:
-                    return output, None
-                return None, "Unable to fetch video URL"
-        except Exception as e:
-            print(f"Error in slider method: {e}")
-            return None, str(e)
+        Raises ValueError when the search found nothing.
+        """
+        key = (link, str(user_id))
+        result = self.searches.get(key)
+        if result is None:
+            results = VideosSearch(link, limit=10)
+            result = (await results.next()).get("result")
+            if not result:
+                raise ValueError(f"No results for {link}")
+            self.searches.set(key, result)
+        item = result[int(query_type) % len(result)]
+        title = item["title"]
+        duration_min = item["duration"]
+        vidid = item["id"]
+        thumbnail = item["thumbnails"][0]["url"].split("?")[0]
+        return title, duration_min, thumbnail, vidid
+
+    def path(self, vidid: str, video: Union[bool, str] = None) -> str:
+        """Returns where the audio or video variant of a video is cached."""
+        kind = "video" if video else "audio"
+        return os.path.join("downloads", f"{vidid}_{kind}.{self.containers[kind]}")
 
     async def download(
         self,
         link: str,
+        mystic,
+        video: Union[bool, str] = None,
         videoid: Union[bool, str] = None,
         format_id: Union[str, None] = None,
-        download: bool = True,
-    ) -> Tuple[Union[str, None], Union[str, None]]:
-        """Handles video downloading and returns the file path."""
-        try:
-            if videoid:
-                link = self.base + link
-            if "&" in link:
-                link = link.split("&")[0]
+        _=None,
+    ) -> Tuple[str, bool]:
+        """Downloads a video once for every chat requesting it and returns the file path.
 
-            file_path = f"downloads/{videoid}.mp4" if videoid else "downloads/temp.mp4"
+        Audio plays only fetch an audio stream, video plays a resolution capped
+        video, and both variants are cached under their own file.
 
-            if not os.path.exists(file_path) or not download:
-                formats_available, link = await self.formats(link, videoid)
-                if formats_available:
-                    format_id = format_id or formats_available[0]["format_id"]
-                    output = await self.slider(link, "url", download, format_id)
-                    if output[0]:
-                        with open(file_path, 'wb') as f:
-                            f.write(output[0])
-                        return file_path, None
-                    return None, output[1]
-                return None, "No formats available"
-            return file_path, None
-        except Exception as e:
-            print(f"Error in download method: {e}")
-            return None, str(e)
+        With STREAM_MODE set to direct, an uncached video is returned as its
+        remote media url (direct is False) while the download continues in the
+        background, ready for seeks, replays and as a fallback. The caller then
+        owns a reference to the file and hands it to its track with pin().
+
+        Progress is shown in `mystic`, in the language strings `_` of the chat.
+        """
+        name = link if videoid else re.sub(r"\W+", "_", link)
+        if videoid:
+            link = self.base + link
+        if "&" in link:
+            link = link.split("&")[0]
+        kind = "video" if video else "audio"
+        file_path = self.path(name, video)
+
+        async def worker(temp: str):
+            fmt = format_id or self.format_policy[kind]
+            progress = ProgressReporter(mystic, _) if mystic else None
+            try:
+                await ytdl(
+                    link,
+                    temp,
+                    fmt,
+                    merge="mp4" if video else None,
+                    progress=progress.event if progress else None,
+                )
+            finally:
+                if progress:
+                    progress.close()
+
+        if config.STREAM_MODE == "direct" and not format_id:
+            if not os.path.isfile(file_path):
+                retain(file_path)
+                task = asyncio.ensure_future(fetch(file_path, worker))
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                n, url = await self.video(link, fmt=self.remote_policy[kind])
+                if n:
+                    add_remote(url, file_path)
+                    return url, False
+                release(file_path)
+                return await task, True
+
+        file_path = await fetch(file_path, worker)
+        return file_path, True
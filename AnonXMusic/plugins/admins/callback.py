@@ -1,14 +1,11 @@
-import asyncio
-
 from pyrogram import filters
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from AnonXMusic import YouTube, app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import SUDOERS, db
+from AnonXMusic.utils.bars import watch_player
 from AnonXMusic.utils.database import (
-    get_active_chats,
-    get_lang,
     get_upvote_count,
     is_active_chat,
     is_music_playing,
@@ -18,9 +15,10 @@ from AnonXMusic.utils.database import (
     set_loop,
 )
 from AnonXMusic.utils.decorators.language import languageCB
-from AnonXMusic.utils.formatters import seconds_to_min
-from AnonXMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
-from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.fileids import reply_photo
+from AnonXMusic.utils.inline import close_markup, stream_markup
+from AnonXMusic.utils.playback import start_track
+from AnonXMusic.utils.stream.autoclear import auto_clean, pin, swap_file
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import (
     BANNED_USERS,
@@ -33,9 +31,7 @@ from config import (
     confirmer,
     votemode,
 )
-from strings import get_string
 
-checker = {}
 upvoters = {}
 
 
@@ -163,7 +159,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             txt = f"➻ sᴛʀᴇᴀᴍ sᴋɪᴩᴩᴇᴅ 🎄\n│ \n└ʙʏ : {mention} 🥀"
             popped = None
             try:
-                popped = check.pop(0)
+                popped = check.advance()
                 if popped:
                     await auto_clean(popped)
                 if not check:
@@ -204,7 +200,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         streamtype = check[0]["streamtype"]
         videoid = check[0]["vidid"]
         status = True if str(streamtype) == "video" else None
-        db[chat_id][0]["played"] = 0
+        start_track(db[chat_id][0])
         exis = (check[0]).get("old_dur")
         if exis:
             db[chat_id][0]["dur"] = exis
@@ -228,7 +224,8 @@ async def del_back_playlist(client, CallbackQuery, _):
                 return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
             img = await get_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
+            run = await reply_photo(
+                CallbackQuery.message,
                 photo=img,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
@@ -238,8 +235,9 @@ async def del_back_playlist(client, CallbackQuery, _):
                 ),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "tg"
+            watch_player(chat_id, run, _)
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         elif "vid_" in queued:
             mystic = await CallbackQuery.message.reply_text(
@@ -251,9 +249,14 @@ async def del_back_playlist(client, CallbackQuery, _):
                     mystic,
                     videoid=True,
                     video=status,
+                    _=_,
                 )
             except:
                 return await mystic.edit_text(_["call_6"])
+            if direct:
+                swap_file(check[0], file_path)
+            else:
+                pin(check[0], YouTube.path(videoid, status))
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
@@ -264,7 +267,8 @@ async def del_back_playlist(client, CallbackQuery, _):
                 return await mystic.edit_text(_["call_6"])
             button = stream_markup(_, chat_id)
             img = await get_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
+            run = await reply_photo(
+                CallbackQuery.message,
                 photo=img,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
@@ -274,8 +278,9 @@ async def del_back_playlist(client, CallbackQuery, _):
                 ),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "stream"
+            watch_player(chat_id, run, _)
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
             await mystic.delete()
         elif "index_" in queued:
@@ -284,13 +289,15 @@ async def del_back_playlist(client, CallbackQuery, _):
             except:
                 return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            run = await CallbackQuery.message.reply_photo(
+            run = await reply_photo(
+                CallbackQuery.message,
                 photo=STREAM_IMG_URL,
                 caption=_["stream_2"].format(user),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "tg"
+            watch_player(chat_id, run, _)
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         else:
             if videoid == "telegram":
@@ -308,7 +315,8 @@ async def del_back_playlist(client, CallbackQuery, _):
                 return await CallbackQuery.message.reply_text(_["call_6"])
             if videoid == "telegram":
                 button = stream_markup(_, chat_id)
-                run = await CallbackQuery.message.reply_photo(
+                run = await reply_photo(
+                    CallbackQuery.message,
                     photo=TELEGRAM_AUDIO_URL
                     if str(streamtype) == "audio"
                     else TELEGRAM_VIDEO_URL,
@@ -317,11 +325,13 @@ async def del_back_playlist(client, CallbackQuery, _):
                     ),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "tg"
+                watch_player(chat_id, run, _)
             elif videoid == "soundcloud":
                 button = stream_markup(_, chat_id)
-                run = await CallbackQuery.message.reply_photo(
+                run = await reply_photo(
+                    CallbackQuery.message,
                     photo=SOUNCLOUD_IMG_URL
                     if str(streamtype) == "audio"
                     else TELEGRAM_VIDEO_URL,
@@ -330,12 +340,14 @@ async def del_back_playlist(client, CallbackQuery, _):
                     ),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "tg"
+                watch_player(chat_id, run, _)
             else:
                 button = stream_markup(_, chat_id)
                 img = await get_thumb(videoid)
-                run = await CallbackQuery.message.reply_photo(
+                run = await reply_photo(
+                    CallbackQuery.message,
                     photo=img,
                     caption=_["stream_1"].format(
                         f"https://t.me/{app.username}?start=info_{videoid}",
@@ -345,53 +357,8 @@ async def del_back_playlist(client, CallbackQuery, _):
                     ),
                     reply_markup=InlineKeyboardMarkup(button),
                 )
-                db[chat_id][0]["mystic"] = run
+                db[chat_id][0]["mystic"] = run.id
                 db[chat_id][0]["markup"] = "stream"
+                watch_player(chat_id, run, _)
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
 
-
-async def markup_timer():
-    while not await asyncio.sleep(7):
-        active_chats = await get_active_chats()
-        for chat_id in active_chats:
-            try:
-                if not await is_music_playing(chat_id):
-                    continue
-                playing = db.get(chat_id)
-                if not playing:
-                    continue
-                duration_seconds = int(playing[0]["seconds"])
-                if duration_seconds == 0:
-                    continue
-                try:
-                    mystic = playing[0]["mystic"]
-                except:
-                    continue
-                try:
-                    check = checker[chat_id][mystic.id]
-                    if check is False:
-                        continue
-                except:
-                    pass
-                try:
-                    language = await get_lang(chat_id)
-                    _ = get_string(language)
-                except:
-                    _ = get_string("en")
-                try:
-                    buttons = stream_markup_timer(
-                        _,
-                        chat_id,
-                        seconds_to_min(playing[0]["played"]),
-                        playing[0]["dur"],
-                    )
-                    await mystic.edit_reply_markup(
-                        reply_markup=InlineKeyboardMarkup(buttons)
-                    )
-                except:
-                    continue
-            except:
-                continue
-
-
-asyncio.create_task(markup_timer())
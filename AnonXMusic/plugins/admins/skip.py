@@ -5,10 +5,13 @@ import config
 from AnonXMusic import YouTube, app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import db
+from AnonXMusic.utils.bars import watch_player
 from AnonXMusic.utils.database import get_loop
 from AnonXMusic.utils.decorators import AdminRightsCheck
+from AnonXMusic.utils.fileids import reply_photo
 from AnonXMusic.utils.inline import close_markup, stream_markup
-from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.playback import start_track
+from AnonXMusic.utils.stream.autoclear import auto_clean, pin, swap_file
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import BANNED_USERS
 
@@ -31,27 +34,21 @@ async def skip(cli, message: Message, _, chat_id):
                 if count > 2:
                     count = int(count - 1)
                     if 1 <= state <= count:
-                        for x in range(state):
-                            popped = None
+                        for popped in check.skip_n(state):
+                            await auto_clean(popped)
+                        if not check:
                             try:
-                                popped = check.pop(0)
+                                await message.reply_text(
+                                    text=_["admin_6"].format(
+                                        message.from_user.mention,
+                                        message.chat.title,
+                                    ),
+                                    reply_markup=close_markup(_),
+                                )
+                                await Anony.stop_stream(chat_id)
                             except:
-                                return await message.reply_text(_["admin_12"])
-                            if popped:
-                                await auto_clean(popped)
-                            if not check:
-                                try:
-                                    await message.reply_text(
-                                        text=_["admin_6"].format(
-                                            message.from_user.mention,
-                                            message.chat.title,
-                                        ),
-                                        reply_markup=close_markup(_),
-                                    )
-                                    await Anony.stop_stream(chat_id)
-                                except:
-                                    return
-                                break
+                                pass
+                            return
                     else:
                         return await message.reply_text(_["admin_11"].format(count))
                 else:
@@ -64,7 +61,7 @@ async def skip(cli, message: Message, _, chat_id):
         check = db.get(chat_id)
         popped = None
         try:
-            popped = check.pop(0)
+            popped = check.advance()
             if popped:
                 await auto_clean(popped)
             if not check:
@@ -95,7 +92,7 @@ async def skip(cli, message: Message, _, chat_id):
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
+    start_track(db[chat_id][0])
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
@@ -116,7 +113,8 @@ async def skip(cli, message: Message, _, chat_id):
             return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
         img = await get_thumb(videoid)
-        run = await message.reply_photo(
+        run = await reply_photo(
+            message,
             photo=img,
             caption=_["stream_1"].format(
                 f"https://t.me/{app.username}?start=info_{videoid}",
@@ -126,8 +124,9 @@ async def skip(cli, message: Message, _, chat_id):
             ),
             reply_markup=InlineKeyboardMarkup(button),
         )
-        db[chat_id][0]["mystic"] = run
+        db[chat_id][0]["mystic"] = run.id
         db[chat_id][0]["markup"] = "tg"
+        watch_player(chat_id, run, _)
     elif "vid_" in queued:
         mystic = await message.reply_text(_["call_7"], disable_web_page_preview=True)
         try:
@@ -136,9 +135,14 @@ async def skip(cli, message: Message, _, chat_id):
                 mystic,
                 videoid=True,
                 video=status,
+                _=_,
             )
         except:
             return await mystic.edit_text(_["call_6"])
+        if direct:
+            swap_file(check[0], file_path)
+        else:
+            pin(check[0], YouTube.path(videoid, status))
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
@@ -149,7 +153,8 @@ async def skip(cli, message: Message, _, chat_id):
             return await mystic.edit_text(_["call_6"])
         button = stream_markup(_, chat_id)
         img = await get_thumb(videoid)
-        run = await message.reply_photo(
+        run = await reply_photo(
+            message,
             photo=img,
             caption=_["stream_1"].format(
                 f"https://t.me/{app.username}?start=info_{videoid}",
@@ -159,8 +164,9 @@ async def skip(cli, message: Message, _, chat_id):
             ),
             reply_markup=InlineKeyboardMarkup(button),
         )
-        db[chat_id][0]["mystic"] = run
+        db[chat_id][0]["mystic"] = run.id
         db[chat_id][0]["markup"] = "stream"
+        watch_player(chat_id, run, _)
         await mystic.delete()
     elif "index_" in queued:
         try:
@@ -168,13 +174,15 @@ async def skip(cli, message: Message, _, chat_id):
         except:
             return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        run = await message.reply_photo(
+        run = await reply_photo(
+            message,
             photo=config.STREAM_IMG_URL,
             caption=_["stream_2"].format(user),
             reply_markup=InlineKeyboardMarkup(button),
         )
-        db[chat_id][0]["mystic"] = run
+        db[chat_id][0]["mystic"] = run.id
         db[chat_id][0]["markup"] = "tg"
+        watch_player(chat_id, run, _)
     else:
         if videoid == "telegram":
             image = None
@@ -191,7 +199,8 @@ async def skip(cli, message: Message, _, chat_id):
             return await message.reply_text(_["call_6"])
         if videoid == "telegram":
             button = stream_markup(_, chat_id)
-            run = await message.reply_photo(
+            run = await reply_photo(
+                message,
                 photo=config.TELEGRAM_AUDIO_URL
                 if str(streamtype) == "audio"
                 else config.TELEGRAM_VIDEO_URL,
@@ -200,11 +209,13 @@ async def skip(cli, message: Message, _, chat_id):
                 ),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "tg"
+            watch_player(chat_id, run, _)
         elif videoid == "soundcloud":
             button = stream_markup(_, chat_id)
-            run = await message.reply_photo(
+            run = await reply_photo(
+                message,
                 photo=config.SOUNCLOUD_IMG_URL
                 if str(streamtype) == "audio"
                 else config.TELEGRAM_VIDEO_URL,
@@ -213,12 +224,14 @@ async def skip(cli, message: Message, _, chat_id):
                 ),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "tg"
+            watch_player(chat_id, run, _)
         else:
             button = stream_markup(_, chat_id)
             img = await get_thumb(videoid)
-            run = await message.reply_photo(
+            run = await reply_photo(
+                message,
                 photo=img,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
@@ -228,5 +241,6 @@ async def skip(cli, message: Message, _, chat_id):
                 ),
                 reply_markup=InlineKeyboardMarkup(button),
             )
-            db[chat_id][0]["mystic"] = run
+            db[chat_id][0]["mystic"] = run.id
             db[chat_id][0]["markup"] = "stream"
+            watch_player(chat_id, run, _)
@@ -1,3 +1,8 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict
+
 from pyrogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -7,42 +12,80 @@ from youtubesearchpython.__future__ import VideosSearch
 
 from AnonXMusic import app
 from AnonXMusic.utils.inlinequery import answer
+from AnonXMusic.utils.ttlcache import TTLCache
 from config import BANNED_USERS
 
+# lowered query -> youtube search results
+searches = TTLCache(600, maxsize=512)
+# user id -> search waiting for the user to stop typing
+pending: Dict[int, asyncio.Task] = {}
+DEBOUNCE = 0.6
+RATE_LIMIT = 5
+RATE_PERIOD = 30
 
-@app.on_inline_query(~BANNED_USERS)
-async def inline_query_handler(client, query):
-    text = query.query.strip().lower()
+# user id -> time of the searches made in the last RATE_PERIOD seconds,
+# a user is forgotten once the window is over
+requests = TTLCache(RATE_PERIOD, maxsize=4096)
+# how many extra characters a cached query may have to be reused for a prefix
+PREFIX_SLACK = 3
+
+
+def cached(text: str):
+    result = searches.get(text)
+    if result is not None:
+        return result
+    best = None
+    for key, value in searches.items():
+        if key.startswith(text) and len(key) - len(text) <= PREFIX_SLACK:
+            if best is None or len(key) < len(best[0]):
+                best = (key, value)
+    return best[1] if best else None
+
+
+def limited(user_id: int) -> bool:
+    now = time.monotonic()
+    window = requests.get(user_id) or deque()
+    while window and now - window[0] > RATE_PERIOD:
+        window.popleft()
+    if len(window) >= RATE_LIMIT:
+        return True
+    window.append(now)
+    requests.set(user_id, window)
+    return False
+
+
+async def search(user_id: int, text: str):
+    await asyncio.sleep(DEBOUNCE)
+    if limited(user_id):
+        return None
+    result = (await VideosSearch(text, limit=20).next()).get("result")
+    searches.set(text, result)
+    return result
+
+
+def build(result: list) -> list:
     answers = []
-    if text.strip() == "":
-        try:
-            await client.answer_inline_query(query.id, results=answer, cache_time=10)
-        except:
-            return
-    else:
-        a = VideosSearch(text, limit=20)
-        result = (await a.next()).get("result")
-        for x in range(15):
-            title = (result[x]["title"]).title()
-            duration = result[x]["duration"]
-            views = result[x]["viewCount"]["short"]
-            thumbnail = result[x]["thumbnails"][0]["url"].split("?")[0]
-            channellink = result[x]["channel"]["link"]
-            channel = result[x]["channel"]["name"]
-            link = result[x]["link"]
-            published = result[x]["publishedTime"]
-            description = f"{views} | {duration} ᴍɪɴᴜᴛᴇs | {channel}  | {published}"
-            buttons = InlineKeyboardMarkup(
+    for item in result[:15]:
+        title = (item["title"]).title()
+        duration = item["duration"]
+        views = item["viewCount"]["short"]
+        thumbnail = item["thumbnails"][0]["url"].split("?")[0]
+        channellink = item["channel"]["link"]
+        channel = item["channel"]["name"]
+        link = item["link"]
+        published = item["publishedTime"]
+        description = f"{views} | {duration} ᴍɪɴᴜᴛᴇs | {channel}  | {published}"
+        buttons = InlineKeyboardMarkup(
+            [
                 [
-                    [
-                        InlineKeyboardButton(
-                            text="ʏᴏᴜᴛᴜʙᴇ 🎄",
-                            url=link,
-                        )
-                    ],
-                ]
-            )
-            searched_text = f"""
+                    InlineKeyboardButton(
+                        text="ʏᴏᴜᴛᴜʙᴇ 🎄",
+                        url=link,
+                    )
+                ],
+            ]
+        )
+        searched_text = f"""
 ❄ <b>ᴛɪᴛʟᴇ :</b> <a href={link}>{title}</a>
 
 ⏳ <b>ᴅᴜʀᴀᴛɪᴏɴ :</b> {duration} ᴍɪɴᴜᴛᴇs
@@ -52,17 +95,56 @@ async def inline_query_handler(client, query):
 
 
 <u><b>➻ ɪɴʟɪɴᴇ sᴇᴀʀᴄʜ ᴍᴏᴅᴇ ʙʏ {app.name}</b></u>"""
-            answers.append(
-                InlineQueryResultPhoto(
-                    photo_url=thumbnail,
-                    title=title,
-                    thumb_url=thumbnail,
-                    description=description,
-                    caption=searched_text,
-                    reply_markup=buttons,
-                )
+        answers.append(
+            InlineQueryResultPhoto(
+                photo_url=thumbnail,
+                title=title,
+                thumb_url=thumbnail,
+                description=description,
+                caption=searched_text,
+                reply_markup=buttons,
             )
+        )
+    return answers
+
+
+@app.on_inline_query(~BANNED_USERS)
+async def inline_query_handler(client, query):
+    text = query.query.strip().lower()
+    user_id = query.from_user.id
+    if text == "":
         try:
-            return await client.answer_inline_query(query.id, results=answers)
+            await client.answer_inline_query(query.id, results=answer, cache_time=10)
         except:
             return
+        return
+    result = cached(text)
+    if result is None:
+        previous = pending.pop(user_id, None)
+        if previous:
+            previous.cancel()
+        task = asyncio.ensure_future(search(user_id, text))
+        pending[user_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            # superseded by a newer query of the same user
+            return
+        except:
+            result = None
+        finally:
+            if pending.get(user_id) is task:
+                pending.pop(user_id)
+        if result is None:
+            try:
+                return await client.answer_inline_query(
+                    query.id, results=[], cache_time=5, is_personal=True
+                )
+            except:
+                return
+    try:
+        return await client.answer_inline_query(
+            query.id, results=build(result), cache_time=300
+        )
+    except:
+        return
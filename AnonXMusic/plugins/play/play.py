@@ -626,11 +626,19 @@ async def slider_queries(client, CallbackQuery, _):
             query_type = 0
         else:
             query_type = int(rtype + 1)
+        try:
+            title, duration_min, thumbnail, vidid = await YouTube.slider(
+                query, query_type, user_id
+            )
+        except:
+            try:
+                return await CallbackQuery.answer(_["play_3"], show_alert=True)
+            except:
+                return
         try:
             await CallbackQuery.answer(_["playcb_2"])
         except:
             pass
-        title, duration_min, thumbnail, vidid = await YouTube.slider(query, query_type)
         buttons = slider_markup(_, vidid, user_id, query, query_type, cplay, fplay)
         med = InputMediaPhoto(
             media=thumbnail,
@@ -647,11 +655,19 @@ async def slider_queries(client, CallbackQuery, _):
             query_type = 9
         else:
             query_type = int(rtype - 1)
+        try:
+            title, duration_min, thumbnail, vidid = await YouTube.slider(
+                query, query_type, user_id
+            )
+        except:
+            try:
+                return await CallbackQuery.answer(_["play_3"], show_alert=True)
+            except:
+                return
         try:
             await CallbackQuery.answer(_["playcb_2"])
         except:
             pass
-        title, duration_min, thumbnail, vidid = await YouTube.slider(query, query_type)
         buttons = slider_markup(_, vidid, user_id, query, query_type, cplay, fplay)
         med = InputMediaPhoto(
             media=thumbnail,
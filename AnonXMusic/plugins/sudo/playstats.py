@@ -0,0 +1,25 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.stream.stream import STAGES, stage_stats
+
+
+@app.on_message(filters.command("playstats") & SUDOERS)
+async def play_stats(_, message: Message):
+    stats = stage_stats()
+    if not stats:
+        return await message.reply_text("» ɴᴏᴛʜɪɴɢ ᴘʟᴀʏᴇᴅ sɪɴᴄᴇ ᴛʜᴇ ʟᴀsᴛ ʀᴇsᴛᴀʀᴛ.")
+    text = "<b>ᴘʟᴀʏ ᴘɪᴘᴇʟɪɴᴇ ᴛɪᴍɪɴɢs :</b>\n"
+    for source, stages in sorted(stats.items()):
+        text += f"\n<b>{source} :</b>\n"
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            t = stages[stage]
+            text += (
+                f"  {stage} : <code>{t['avg_ms']}ms ᴀᴠɢ, {t['max_ms']}ms ᴍᴀx, "
+                f"{t['count']} ʀᴜɴs</code>\n"
+            )
+    await message.reply_text(text)
@@ -12,13 +12,18 @@ from pyrogram import filters
 import config
 from AnonXMusic import app
 from AnonXMusic.misc import HAPP, SUDOERS, XCB
+from AnonXMusic.utils.checkpoint import stop_checkpoints
 from AnonXMusic.utils.database import (
     get_active_chats,
+    get_lang,
     remove_active_chat,
     remove_active_video_chat,
 )
 from AnonXMusic.utils.decorators.language import language
+from AnonXMusic.utils.mediacache import media_cache
 from AnonXMusic.utils.pastebin import AnonyBin
+from AnonXMusic.utils.thumbnails import thumb_cache
+from strings import get_string
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -76,10 +81,20 @@ async def update_(client, message, _):
         nrs = await response.edit(_final_updates_, disable_web_page_preview=True)
     os.system("git stash &> /dev/null && git pull")
 
+    try:
+        await stop_checkpoints()
+    except:
+        pass
     try:
         served_chats = await get_active_chats()
         for x in served_chats:
             try:
+                if config.RESUME_PLAYBACK:
+                    await app.send_message(
+                        chat_id=int(x),
+                        text=_["server_16"].format(app.mention),
+                    )
+                    continue
                 await app.send_message(
                     chat_id=int(x),
                     text=_["server_8"].format(app.mention),
@@ -105,6 +120,8 @@ async def update_(client, message, _):
                 text=_["server_10"].format(err),
             )
     else:
+        media_cache.save()
+        thumb_cache.save()
         os.system("pip3 install -r requirements.txt")
         os.system(f"kill -9 {os.getpid()} && bash start")
         exit()
@@ -113,9 +130,20 @@ async def update_(client, message, _):
 @app.on_message(filters.command(["restart"]) & SUDOERS)
 async def restart_(_, message):
     response = await message.reply_text("ʀᴇsᴛᴀʀᴛɪɴɢ...")
+    try:
+        await stop_checkpoints()
+    except:
+        pass
     ac_chats = await get_active_chats()
     for x in ac_chats:
         try:
+            if config.RESUME_PLAYBACK:
+                language = await get_lang(int(x))
+                await app.send_message(
+                    chat_id=int(x),
+                    text=get_string(language)["server_16"].format(app.mention),
+                )
+                continue
             await app.send_message(
                 chat_id=int(x),
                 text=f"{app.mention} ɪs ʀᴇsᴛᴀʀᴛɪɴɢ...\n\nʏᴏᴜ ᴄᴀɴ sᴛᴀʀᴛ ᴩʟᴀʏɪɴɢ ᴀɢᴀɪɴ ᴀғᴛᴇʀ 15-20 sᴇᴄᴏɴᴅs.",
@@ -125,8 +153,9 @@ async def restart_(_, message):
         except:
             pass
 
+    media_cache.save()
+    thumb_cache.save()
     try:
-        shutil.rmtree("downloads")
         shutil.rmtree("raw_files")
         shutil.rmtree("cache")
     except:
@@ -0,0 +1,22 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.database import get_ytmap_stats
+
+
+@app.on_message(filters.command("ytmap") & SUDOERS)
+async def ytmap_stats(_, message: Message):
+    stats = await get_ytmap_stats()
+    if not stats:
+        return await message.reply_text("» ɴᴏ ᴛʀᴀᴄᴋs ʀᴇsᴏʟᴠᴇᴅ ʏᴇᴛ.")
+    text = "<b>ʏᴏᴜᴛᴜʙᴇ ʀᴇsᴏʟᴜᴛɪᴏɴ ᴄᴀᴄʜᴇ :</b>\n"
+    for platform, counts in sorted(stats.items()):
+        lookups = counts["hits"] + counts["misses"]
+        rate = round(counts["hits"] * 100 / lookups, 2) if lookups else 0
+        text += (
+            f"\n<b>{platform} :</b> <code>{counts['hits']}/{lookups} ʜɪᴛs ({rate}%), "
+            f"{counts.get('stored', 0)} sᴛᴏʀᴇᴅ</code>"
+        )
+    await message.reply_text(text)
@@ -1,27 +1,54 @@
-import asyncio
-import os
-
 from pyrogram import filters
-from pyrogram.errors import FloodWait
+from pyrogram.errors import MessageNotModified
 from pyrogram.types import CallbackQuery, InputMediaPhoto, Message
 
 import config
 from AnonXMusic import app
 from AnonXMusic.misc import db
-from AnonXMusic.utils import AnonyBin, get_channeplayCB, seconds_to_min
-from AnonXMusic.utils.database import get_cmode, is_active_chat, is_music_playing
+from AnonXMusic.utils import get_channeplayCB, seconds_to_min
+from AnonXMusic.utils.bars import bar_scheduler
+from AnonXMusic.utils.database import get_cmode, is_active_chat
 from AnonXMusic.utils.decorators.language import language, languageCB
-from AnonXMusic.utils.inline import queue_back_markup, queue_markup
+from AnonXMusic.utils.inline import queue_markup, queue_page_markup
+from AnonXMusic.utils.playback import get_played
+from AnonXMusic.utils.stream.queue import queue_snapshot
+from AnonXMusic.utils.thumbnails import cached_thumb
 from config import BANNED_USERS
 
-basic = {}
+# tracks listed on one page of the queue browser
+PAGE_SIZE = 5
 
 
 def get_image(videoid):
-    if os.path.isfile(f"cache/{videoid}.png"):
-        return f"cache/{videoid}.png"
-    else:
-        return config.YOUTUBE_IMG_URL
+    return cached_thumb(videoid) or config.YOUTUBE_IMG_URL
+
+
+def timer_markup(_, DUR, cplay, videoid):
+    return lambda track: queue_markup(
+        _,
+        DUR,
+        cplay,
+        videoid,
+        seconds_to_min(get_played(track)),
+        track["dur"],
+    )
+
+
+def page_count(tracks) -> int:
+    return (len(tracks) + PAGE_SIZE - 1) // PAGE_SIZE
+
+
+def queue_page(tracks, page) -> str:
+    """Lists one page of a queue snapshot, only the tracks of that page are read."""
+    msg = ""
+    first = page * PAGE_SIZE
+    for j, x in enumerate(tracks[first : first + PAGE_SIZE], start=first):
+        if j == 0:
+            msg += "Streaming :\n\n"
+        elif j == 1:
+            msg += "Queued :\n\n"
+        msg += f'✨ {j}. {x["title"][:40]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
+    return msg
 
 
 def get_duration(playing):
@@ -92,39 +119,15 @@ async def get_queue(client, message: Message, _):
             DUR,
             "c" if cplay else "g",
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(get_played(got[0])),
             got[0]["dur"],
         )
     )
-    basic[videoid] = True
     mystic = await message.reply_photo(IMAGE, caption=cap, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    "c" if cplay else "g",
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        bar_scheduler.watch(
+            chat_id, mystic, timer_markup(_, DUR, "c" if cplay else "g", videoid)
+        )
 
 
 @app.on_callback_query(filters.regex("GetTimer") & ~BANNED_USERS)
@@ -147,41 +150,47 @@ async def queued_tracks(client, CallbackQuery: CallbackQuery, _):
         return
     if not await is_active_chat(chat_id):
         return await CallbackQuery.answer(_["general_5"], show_alert=True)
-    got = db.get(chat_id)
-    if not got:
+    tracks = queue_snapshot(chat_id)
+    if not tracks:
         return await CallbackQuery.answer(_["queue_2"], show_alert=True)
-    if len(got) == 1:
+    if len(tracks) == 1:
         return await CallbackQuery.answer(_["queue_5"], show_alert=True)
     await CallbackQuery.answer()
-    basic[videoid] = False
-    buttons = queue_back_markup(_, what)
+    bar_scheduler.forget(CallbackQuery.message)
     med = InputMediaPhoto(
         media="https://telegra.ph//file/6f7d35131f69951c74ee5.jpg",
-        caption=_["queue_1"],
+        caption=queue_page(tracks, 0),
+    )
+    await CallbackQuery.edit_message_media(
+        media=med, reply_markup=queue_page_markup(_, what, 0, page_count(tracks))
     )
-    await CallbackQuery.edit_message_media(media=med)
-    j = 0
-    msg = ""
-    for x in got:
-        j += 1
-        if j == 1:
-            msg += f'Streaming :\n\n✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-        elif j == 2:
-            msg += f'Queued :\n\n✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-        else:
-            msg += f'✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-    if "Queued" in msg:
-        if len(msg) < 700:
-            await asyncio.sleep(1)
-            return await CallbackQuery.edit_message_text(msg, reply_markup=buttons)
-        if "✨" in msg:
-            msg = msg.replace("✨", "")
-        link = await AnonyBin(msg)
-        med = InputMediaPhoto(media=link, caption=_["queue_3"].format(link))
-        await CallbackQuery.edit_message_media(media=med, reply_markup=buttons)
-    else:
-        await asyncio.sleep(1)
-        return await CallbackQuery.edit_message_text(msg, reply_markup=buttons)
+
+
+@app.on_callback_query(filters.regex("queue_page") & ~BANNED_USERS)
+@languageCB
+async def queue_pages(client, CallbackQuery: CallbackQuery, _):
+    callback_data = CallbackQuery.data.strip()
+    callback_request = callback_data.split(None, 1)[1]
+    what, page = callback_request.split("|")
+    try:
+        chat_id, channel = await get_channeplayCB(_, what, CallbackQuery)
+    except:
+        return
+    if not await is_active_chat(chat_id):
+        return await CallbackQuery.answer(_["general_5"], show_alert=True)
+    tracks = queue_snapshot(chat_id)
+    if not tracks:
+        return await CallbackQuery.answer(_["queue_2"], show_alert=True)
+    pages = page_count(tracks)
+    page = min(int(page), pages - 1)
+    await CallbackQuery.answer()
+    try:
+        await CallbackQuery.edit_message_caption(
+            queue_page(tracks, page),
+            reply_markup=queue_page_markup(_, what, page, pages),
+        )
+    except MessageNotModified:
+        pass
 
 
 @app.on_callback_query(filters.regex("queue_back_timer") & ~BANNED_USERS)
@@ -232,38 +241,12 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
             DUR,
             cplay,
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(get_played(got[0])),
             got[0]["dur"],
         )
     )
-    basic[videoid] = True
 
     med = InputMediaPhoto(media=IMAGE, caption=cap)
     mystic = await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    cplay,
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        bar_scheduler.watch(chat_id, mystic, timer_markup(_, DUR, cplay, videoid))
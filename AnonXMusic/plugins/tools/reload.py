@@ -7,7 +7,7 @@ from pyrogram.types import CallbackQuery, Message
 
 from AnonXMusic import app
 from AnonXMusic.core.call import Anony
-from AnonXMusic.misc import db
+from AnonXMusic.utils.bars import bar_scheduler
 from AnonXMusic.utils.database import get_assistant, get_authuser_names, get_cmode
 from AnonXMusic.utils.decorators import ActualAdminCB, AdminActual, language
 from AnonXMusic.utils.formatters import alpha_to_int, get_readable_time
@@ -52,7 +52,6 @@ async def restartbot(client, message: Message, _):
     mystic = await message.reply_text(_["reload_4"].format(app.mention))
     await asyncio.sleep(1)
     try:
-        db[message.chat.id] = []
         await Anony.stop_stream_force(message.chat.id)
     except:
         pass
@@ -79,7 +78,6 @@ async def restartbot(client, message: Message, _):
         except:
             pass
         try:
-            db[chat_id] = []
             await Anony.stop_stream_force(chat_id)
         except:
             pass
@@ -90,6 +88,7 @@ async def restartbot(client, message: Message, _):
 async def close_menu(_, query: CallbackQuery):
     try:
         await query.answer()
+        bar_scheduler.forget(query.message)
         await query.message.delete()
         umm = await query.message.reply_text(
             f"Cʟᴏsᴇᴅ ʙʏ : {query.from_user.mention}"
@@ -15,7 +15,10 @@ from AnonXMusic.misc import SUDOERS, mongodb
 from AnonXMusic.plugins import ALL_MODULES
 from AnonXMusic.utils.database import get_served_chats, get_served_users, get_sudoers
 from AnonXMusic.utils.decorators.language import language, languageCB
+from AnonXMusic.utils.formatters import convert_bytes
 from AnonXMusic.utils.inline.stats import back_stats_buttons, stats_buttons
+from AnonXMusic.utils.mediacache import media_cache
+from AnonXMusic.utils.thumbnails import thumb_stats
 from config import BANNED_USERS
 
 
@@ -126,6 +129,22 @@ async def bot_stats(client, CallbackQuery, _):
         call["collections"],
         call["objects"],
     )
+    cache = media_cache.stats()
+    text += _["gstats_6"].format(
+        cache["files"],
+        convert_bytes(cache["size"]) or "0 B",
+        convert_bytes(cache["limit"]),
+        cache["hit_rate"],
+        convert_bytes(cache["saved"]) or "0 B",
+    )
+    thumbs = thumb_stats()
+    text += _["gstats_7"].format(
+        thumbs["rendered"],
+        thumbs["failed"],
+        thumbs["deduped"],
+        thumbs["avg_ms"],
+        thumbs["max_ms"],
+    )
     med = InputMediaPhoto(media=config.STATS_IMG_URL, caption=text)
     try:
         await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Callable, Dict, Tuple
+
+from pyrogram.errors import FloodWait, MessageNotModified
+from pyrogram.types import InlineKeyboardMarkup, Message
+
+from AnonXMusic import app
+from AnonXMusic.core.queue import Track
+from AnonXMusic.misc import db
+from AnonXMusic.utils.inline.play import stream_markup_timer
+from AnonXMusic.utils.playback import get_played
+
+# seconds between two rounds of edits in a chat, grows on FloodWait
+INTERVAL = 5
+MAX_INTERVAL = 60
+# live messages kept per chat, older ones stop moving
+MAX_WATCHED = 3
+
+
+class Watch:
+    __slots__ = ("chat", "message_id", "track", "build", "played")
+
+    def __init__(self, message: Message, track: Track, build: Callable):
+        # only the ids, the message object is not kept alive
+        self.chat = message.chat.id
+        self.message_id = message.id
+        self.track = track
+        self.build = build
+        self.played = None
+
+
+class BarScheduler:
+    """Moves the progress bar of every live player message from a single task.
+
+    Messages are grouped by the chat whose track they show and a chat is
+    edited at most once per interval, which doubles after a FloodWait and
+    shrinks back as edits go through. A message is dropped once its track
+    is no longer playing, it is closed or it can not be edited anymore.
+    """
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        # chat_id -> (message chat, message id) -> watch
+        self.chats: Dict[int, Dict[Tuple[int, int], Watch]] = {}
+        self.delay: Dict[int, float] = {}
+        self.next: Dict[int, float] = {}
+        self.task = None
+
+    def watch(self, chat_id: int, message: Message, build: Callable):
+        """Keeps `message` updated with `build(track)` while the current track plays."""
+        playing = db.get(chat_id)
+        if not message or not playing or not int(playing[0].get("seconds") or 0):
+            return
+        watched = self.chats.setdefault(chat_id, {})
+        key = (message.chat.id, message.id)
+        watched.pop(key, None)
+        watched[key] = Watch(message, playing[0], build)
+        while len(watched) > MAX_WATCHED:
+            watched.pop(next(iter(watched)))
+        self.next.setdefault(chat_id, time.monotonic() + self._delay(chat_id))
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+    def forget(self, message: Message):
+        key = (message.chat.id, message.id)
+        for watched in self.chats.values():
+            watched.pop(key, None)
+
+    def _delay(self, chat_id: int) -> float:
+        return self.delay.get(chat_id, self.interval)
+
+    async def _run(self):
+        while self.chats:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            due = [
+                chat_id
+                for chat_id in list(self.chats)
+                if now >= self.next.get(chat_id, 0)
+            ]
+            if due:
+                await asyncio.gather(*[self._update(chat_id) for chat_id in due])
+
+    async def _update(self, chat_id: int):
+        watched = self.chats.get(chat_id, {})
+        playing = db.get(chat_id)
+        delay = self._delay(chat_id)
+        self.next[chat_id] = time.monotonic() + delay
+        flooded = False
+        for key, watch in list(watched.items()):
+            if not playing or playing[0] is not watch.track:
+                watched.pop(key, None)
+                continue
+            played = get_played(watch.track)
+            if played == watch.played:
+                # paused, nothing moved
+                continue
+            try:
+                await app.edit_message_reply_markup(
+                    watch.chat,
+                    watch.message_id,
+                    reply_markup=watch.build(watch.track),
+                )
+                watch.played = played
+            except FloodWait as fw:
+                flooded = True
+                self.delay[chat_id] = min(delay * 2, MAX_INTERVAL)
+                self.next[chat_id] = time.monotonic() + int(fw.value)
+                break
+            except MessageNotModified:
+                watch.played = played
+            except Exception:
+                watched.pop(key, None)
+        if not flooded and delay > self.interval:
+            self.delay[chat_id] = max(self.interval, delay - 1)
+        if not watched:
+            self.chats.pop(chat_id, None)
+            self.next.pop(chat_id, None)
+            if self._delay(chat_id) <= self.interval:
+                self.delay.pop(chat_id, None)
+
+
+bar_scheduler = BarScheduler()
+
+
+def watch_player(chat_id: int, message: Message, _):
+    """Moves the timer of a now playing message."""
+    bar_scheduler.watch(
+        chat_id,
+        message,
+        lambda track: InlineKeyboardMarkup(stream_markup_timer(_, chat_id, track)),
+    )
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import time
+from typing import Dict, Tuple, Union
+
+from pyrogram.types import InlineKeyboardMarkup
+
+import config
+from AnonXMusic import LOGGER, YouTube, app
+from AnonXMusic.core.call import Anony
+from AnonXMusic.core.queue import ChatQueue, Track
+from AnonXMusic.misc import db
+from AnonXMusic.utils.bars import watch_player
+from AnonXMusic.utils.database import (
+    delete_queue,
+    get_active_chats,
+    get_lang,
+    get_loop,
+    get_saved_queues,
+    is_active_chat,
+    is_music_playing,
+    music_off,
+    save_queue,
+    set_loop,
+)
+from AnonXMusic.utils.formatters import seconds_to_min
+from AnonXMusic.utils.inline.play import stream_markup
+from AnonXMusic.utils.playback import get_played, start_track
+from AnonXMusic.utils.stream.autoclear import (
+    clean_queue,
+    pin,
+    retain,
+    swap_file,
+    virtual,
+)
+from strings import get_string
+
+# track fields which only mean something to the running process
+TRANSIENT = (
+    "started",
+    "position",
+    "paused_at",
+    "paused_for",
+    "speed",
+    "speed_path",
+    "old_dur",
+    "old_second",
+    "mystic",
+    "pinned",
+)
+# chats rejoined at the same time after a restart, and the tries each one gets
+# while telegram still sees the assistant of the old process in the call
+RESUME_WORKERS = 3
+RESUME_ATTEMPTS = 3
+RESUME_RETRY_DELAY = 10
+
+# chat_id -> (queue, version) whose track list was saved last
+saved: Dict[int, Tuple[int, int]] = {}
+task = None
+
+
+def dump_track(track: Track) -> dict:
+    """The fields of a track needed to queue it again in a new process."""
+    fields = track.to_dict()
+    if track.get("old_dur"):
+        # saved at normal speed, a resumed track plays the original file
+        fields["dur"] = track["old_dur"]
+        fields["seconds"] = track["old_second"]
+    for name in TRANSIENT:
+        fields.pop(name, None)
+    file = str(fields.get("file"))
+    if (
+        not file.startswith(virtual)
+        and not os.path.exists(file)
+        and track.get("markup") == "stream"
+    ):
+        # streamed from its remote url, fetched again when resumed
+        fields["file"] = f"vid_{track['vidid']}"
+    return fields
+
+
+def load_track(chat_id: int, fields) -> Union[Track, None]:
+    """Builds a saved track, ignoring fields another version of the bot wrote."""
+    try:
+        track = Track(**{k: v for k, v in fields.items() if k in Track.__slots__})
+    except Exception as e:
+        LOGGER(__name__).warning(f"Skipped a saved track of {chat_id}: {e}")
+        return None
+    if not track["file"] or not track["chat_id"]:
+        LOGGER(__name__).warning(f"Skipped a saved track of {chat_id}: {fields}")
+        return None
+    return track
+
+
+def position_of(track: Track) -> int:
+    """Seconds of the original track played, whatever speed it runs at."""
+    return int(get_played(track) * float(track.get("speed") or 1.0))
+
+
+async def checkpoint():
+    """Saves where every active chat is, the track list only once it changed."""
+    now = time.time()
+    chats = list(await get_active_chats())
+    for chat_id in chats:
+        queue = db.get(chat_id)
+        if not queue:
+            continue
+        state = {
+            "played": position_of(queue[0]),
+            "paused": not await is_music_playing(chat_id),
+            "loop": await get_loop(chat_id),
+            "saved": now,
+        }
+        version = (id(queue), queue.version)
+        if saved.get(chat_id) != version:
+            state["tracks"] = [dump_track(track) for track in queue]
+            # chats whose queue moved last are resumed first
+            state["updated"] = now
+        try:
+            await save_queue(chat_id, state)
+            saved[chat_id] = version
+        except Exception as e:
+            LOGGER(__name__).warning(f"Checkpoint of {chat_id} failed: {e}")
+    for chat_id in list(saved):
+        if chat_id in chats:
+            continue
+        saved.pop(chat_id, None)
+        try:
+            await delete_queue(chat_id)
+        except:
+            pass
+
+
+async def _run():
+    while True:
+        await asyncio.sleep(config.CHECKPOINT_INTERVAL)
+        try:
+            await checkpoint()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Checkpoint failed: {e}")
+
+
+def start_checkpoints():
+    global task
+    if not config.RESUME_PLAYBACK:
+        return
+    if task is None or task.done():
+        task = asyncio.ensure_future(_run())
+
+
+async def stop_checkpoints():
+    """Writes a last checkpoint before a restart or shutdown."""
+    if not config.RESUME_PLAYBACK:
+        return
+    if task is not None:
+        task.cancel()
+    await checkpoint()
+
+
+async def resume_chat(state: dict):
+    chat_id = state["chat_id"]
+    if await is_active_chat(chat_id):
+        # someone started playing again before the resume got there
+        return
+    tracks = [load_track(chat_id, fields) for fields in state.get("tracks") or []]
+    # local files which did not survive the restart can not be played again
+    tracks = [
+        track
+        for track in tracks
+        if track is not None
+        and (str(track["file"]).startswith(virtual) or os.path.exists(track["file"]))
+    ]
+    if not tracks:
+        return await delete_queue(chat_id)
+    track = tracks[0]
+    file = str(track["file"])
+    video = str(track["streamtype"]) == "video"
+    position = int(state.get("played") or 0)
+    if not int(track.get("seconds") or 0):
+        position = 0
+    queue = db[chat_id] = ChatQueue(tracks)
+    for queued in queue:
+        retain(queued["file"])
+    try:
+        if file.startswith("live_"):
+            n, link = await YouTube.video(track["vidid"], True)
+            if n == 0:
+                raise ValueError(link)
+        elif file.startswith("vid_"):
+            link, direct = await YouTube.download(
+                track["vidid"], None, videoid=True, video=video
+            )
+            if direct:
+                swap_file(track, link)
+            else:
+                pin(track, YouTube.path(track["vidid"], video))
+        elif file.startswith("index_"):
+            link = track["vidid"]
+        else:
+            link = file
+        await Anony.join_call(
+            chat_id, track["chat_id"], link, video=video, seek=position
+        )
+    except:
+        await clean_queue(queue)
+        if db.get(chat_id) is queue:
+            db[chat_id] = ChatQueue()
+        raise
+    start_track(track, position)
+    await set_loop(chat_id, state.get("loop") or 0)
+    if state.get("paused"):
+        await Anony.pause_stream(chat_id)
+        await music_off(chat_id)
+    language = await get_lang(chat_id)
+    _ = get_string(language)
+    try:
+        run = await app.send_message(
+            track["chat_id"],
+            text=_["call_11"].format(
+                track["title"][:23],
+                seconds_to_min(position) if position else "00:00",
+                track["by"],
+            ),
+            reply_markup=InlineKeyboardMarkup(stream_markup(_, chat_id)),
+        )
+    except:
+        # playing already, a lost message is not worth another join
+        return
+    track["mystic"] = run.id
+    watch_player(chat_id, run, _)
+
+
+async def resume():
+    """Rejoins the calls saved by the last run, the most recently active chats first."""
+    if not config.RESUME_PLAYBACK:
+        return
+    try:
+        states = await get_saved_queues()
+    except Exception as e:
+        return LOGGER(__name__).warning(f"Could not load saved queues: {e}")
+    now = time.time()
+    states.sort(key=lambda state: state.get("updated", 0), reverse=True)
+    workers = asyncio.Semaphore(RESUME_WORKERS)
+
+    async def worker(state: dict):
+        chat_id = state["chat_id"]
+        if now - state.get("saved", 0) > config.RESUME_MAX_AGE:
+            return await delete_queue(chat_id)
+        for attempt in range(RESUME_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(RESUME_RETRY_DELAY)
+            try:
+                async with workers:
+                    return await resume_chat(state)
+            except Exception as e:
+                error = e
+        LOGGER(__name__).warning(f"Could not resume {chat_id}: {error}")
+        if not await is_active_chat(chat_id):
+            await delete_queue(chat_id)
+
+    await asyncio.gather(
+        *[worker(state) for state in states], return_exceptions=True
+    )
+    LOGGER(__name__).info(f"Resumed {len(await get_active_chats())} chats.")
@@ -21,6 +21,9 @@ playtypedb = mongodb.playtypedb
 skipdb = mongodb.skipmode
 sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
+ytmapdb = mongodb.ytmap
+fileiddb = mongodb.fileids
+queuesdb = mongodb.queues
 
 # Shifting to memory [mongo sucks often]
 active = []
@@ -37,6 +40,9 @@ pause = {}
 playmode = {}
 playtype = {}
 skipmode = {}
+ytmap = {}
+ytmapstats = {}
+fileids = {}
 
 
 async def get_assistant_number(chat_id: int) -> str:
@@ -644,3 +650,89 @@ async def remove_banned_user(user_id: int):
     if not is_gbanned:
         return
     return await blockeddb.delete_one({"user_id": user_id})
+
+
+def _ytmap_key(key: str) -> str:
+    return " ".join(str(key).lower().split())
+
+
+async def get_ytmap(platform: str, key: str) -> Union[dict, None]:
+    key = _ytmap_key(key)
+    stats = ytmapstats.setdefault(platform, {"hits": 0, "misses": 0})
+    details = ytmap.get((platform, key))
+    if not details:
+        found = await ytmapdb.find_one({"platform": platform, "key": key})
+        if found:
+            details = found["details"]
+            ytmap[(platform, key)] = details
+    if not details:
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return details
+
+
+async def save_ytmap(platform: str, key: str, details: dict):
+    key = _ytmap_key(key)
+    ytmap[(platform, key)] = details
+    while len(ytmap) > 10000:
+        ytmap.pop(next(iter(ytmap)))
+    await ytmapdb.update_one(
+        {"platform": platform, "key": key},
+        {"$set": {"details": details}},
+        upsert=True,
+    )
+
+
+async def get_ytmap_stats() -> Dict[str, dict]:
+    stats = {}
+    for platform, counts in ytmapstats.items():
+        stats[platform] = dict(counts)
+    for platform in await ytmapdb.distinct("platform"):
+        counts = stats.setdefault(platform, {"hits": 0, "misses": 0})
+        counts["stored"] = await ytmapdb.count_documents({"platform": platform})
+    return stats
+
+
+async def get_file_id(key: str) -> Union[str, None]:
+    file_id = fileids.get(key)
+    if file_id:
+        return file_id
+    found = await fileiddb.find_one({"key": key})
+    if not found:
+        return None
+    fileids[key] = found["file_id"]
+    return found["file_id"]
+
+
+async def save_file_id(key: str, file_id: str):
+    fileids[key] = file_id
+    await fileiddb.update_one(
+        {"key": key},
+        {"$set": {"file_id": file_id}},
+        upsert=True,
+    )
+
+
+async def delete_file_id(key: str):
+    fileids.pop(key, None)
+    await fileiddb.delete_one({"key": key})
+
+
+async def save_queue(chat_id: int, state: dict):
+    await queuesdb.update_one(
+        {"chat_id": chat_id},
+        {"$set": state},
+        upsert=True,
+    )
+
+
+async def delete_queue(chat_id: int):
+    await queuesdb.delete_one({"chat_id": chat_id})
+
+
+async def get_saved_queues() -> list:
+    queues = []
+    async for queue in queuesdb.find({"chat_id": {"$lt": 0}}):
+        queues.append(queue)
+    return queues
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from yt_dlp import YoutubeDL
+
+import config
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.formatters import convert_bytes
+from AnonXMusic.utils.mediacache import media_cache
+
+# file path -> running download, shared by every chat asking for that file
+inflight: Dict[str, asyncio.Future] = {}
+# remote media url -> file the same media is being downloaded to
+remote: Dict[str, str] = {}
+# throughput of the most recent downloads, newest last
+history = deque(maxlen=50)
+
+
+async def fetch(path: str, worker: Callable[[str], Awaitable[None]]) -> str:
+    """Fetches `path` once no matter how many chats request it at the same time.
+
+    `worker` receives a temporary path to write into, the finished file is
+    moved to `path` with an atomic rename so a partial download is never
+    picked up by another chat.
+    """
+    if media_cache.lookup(path) or os.path.isfile(path):
+        return path
+    task = inflight.get(path)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(path, worker))
+        inflight[path] = task
+        task.add_done_callback(lambda _: inflight.pop(path, None))
+    return await asyncio.shield(task)
+
+
+async def wait(path: str) -> Optional[str]:
+    """Waits for a running download of `path`, returns None if it is not available."""
+    task = inflight.get(path)
+    if task is not None:
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            return None
+    return path if os.path.isfile(path) else None
+
+
+def add_remote(link: str, path: str):
+    remote[link] = path
+    while len(remote) > 500:
+        remote.pop(next(iter(remote)))
+
+
+async def fallback(link: str) -> Optional[str]:
+    """Returns the local copy of a remote stream once it is downloaded."""
+    path = remote.pop(link, None)
+    if path is None:
+        return None
+    return await wait(path)
+
+
+async def _fetch(path: str, worker: Callable[[str], Awaitable[None]]) -> str:
+    root, ext = os.path.splitext(path)
+    temp = f"{root}.temp{ext}"
+    try:
+        await worker(temp)
+        if not os.path.isfile(temp) or os.path.getsize(temp) == 0:
+            raise FileNotFoundError(f"Download of {path} produced no file")
+        os.replace(temp, path)
+        media_cache.add(path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        LOGGER(__name__).warning(f"Failed to download {path}")
+        raise
+    return path
+
+
+async def ytdl(
+    link: str,
+    path: str,
+    fmt: str,
+    merge: Optional[str] = None,
+    progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+) -> dict:
+    """Downloads `link` into `path` with yt-dlp and returns the download stats.
+
+    Fragments are fetched concurrently and an interrupted download resumes
+    from its .part file on the next attempt. `progress` is awaited on the
+    event loop with every progress event reported by yt-dlp.
+    """
+    loop = asyncio.get_running_loop()
+    stats = {"file": path, "bytes": 0, "seconds": 0, "speed": 0}
+    start = time.time()
+    posted = [0.0]
+
+    def hook(d: dict):
+        status = d.get("status")
+        if not progress or status not in ("downloading", "finished"):
+            return
+        # hooks run for every fragment, hand the loop one event per second at
+        # most while downloading, a finished event always goes through
+        if status == "finished" or time.time() - posted[0] >= 1:
+            posted[0] = time.time()
+            event = {
+                "status": d["status"],
+                "downloaded": d.get("downloaded_bytes") or 0,
+                "total": d.get("total_bytes") or d.get("total_bytes_estimate") or 0,
+                "speed": d.get("speed") or 0,
+                "eta": d.get("eta") or 0,
+                "elapsed": time.time() - start,
+            }
+            asyncio.run_coroutine_threadsafe(progress(event), loop)
+
+    opts = {
+        "format": fmt,
+        "outtmpl": path,
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "geo_bypass": True,
+        "nocheckcertificate": True,
+        "continuedl": True,
+        "overwrites": False,
+        "retries": config.YT_DOWNLOAD_RETRIES,
+        "fragment_retries": config.YT_DOWNLOAD_RETRIES,
+        "concurrent_fragment_downloads": config.YT_CONCURRENT_FRAGMENTS,
+        "progress_hooks": [hook],
+    }
+    if merge:
+        opts["merge_output_format"] = merge
+
+    def download():
+        with YoutubeDL(opts) as ydl:
+            ydl.download([link])
+
+    await loop.run_in_executor(None, download)
+    # post-processors (m4a fixup, merging) rewrite the file after the hooks
+    # reported their byte counts, so only the final file is checked
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        raise FileNotFoundError(f"yt-dlp did not produce {path}")
+    size = os.path.getsize(path)
+    stats["bytes"] = size
+    stats["seconds"] = round(time.time() - start, 2)
+    stats["speed"] = size / stats["seconds"] if stats["seconds"] else size
+    history.append(stats)
+    LOGGER(__name__).info(
+        f"Downloaded {os.path.basename(path)} : {convert_bytes(size)} in "
+        f"{stats['seconds']}s ({convert_bytes(stats['speed'])}/s)"
+    )
+    return stats
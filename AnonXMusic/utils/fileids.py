@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import os
+from typing import Dict, Tuple, Union
+
+from pyrogram.enums import ChatType
+from pyrogram.errors import (
+    FileIdInvalid,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    MediaEmpty,
+)
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.utils.database import delete_file_id, get_file_id, save_file_id
+
+# path -> (mtime, size, digest), so an unchanged file is hashed only once
+_hashes: Dict[str, Tuple[float, int, str]] = {}
+# errors saying the cached file_id itself is no longer usable, ValueError is
+# raised by pyrogram for a file_id it can not decode
+STALE = (
+    FileIdInvalid,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    MediaEmpty,
+    ValueError,
+)
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+async def _key(photo) -> Union[str, None]:
+    """Returns the cache key of a photo, None for anything which is not a url or a file."""
+    if not isinstance(photo, str):
+        return None
+    if photo.startswith(("http://", "https://")):
+        return f"url:{photo}"
+    try:
+        stat = os.stat(photo)
+    except OSError:
+        return None
+    known = _hashes.get(photo)
+    if known and known[:2] == (stat.st_mtime, stat.st_size):
+        return f"file:{known[2]}"
+    digest = await asyncio.get_running_loop().run_in_executor(None, _digest, photo)
+    _hashes[photo] = (stat.st_mtime, stat.st_size, digest)
+    return f"file:{digest}"
+
+
+async def send_photo(chat_id, photo, **kwargs) -> Message:
+    """app.send_photo which uploads a given image or url only once.
+
+    The file_id telegram returns for the first send is reused afterwards,
+    a file_id which telegram no longer accepts is dropped and the image is
+    sent again.
+    """
+    key = await _key(photo)
+    file_id = await get_file_id(key) if key else None
+    if file_id:
+        try:
+            return await app.send_photo(chat_id, file_id, **kwargs)
+        except STALE:
+            await delete_file_id(key)
+    message = await app.send_photo(chat_id, photo, **kwargs)
+    if key and message.photo:
+        await save_file_id(key, message.photo.file_id)
+    return message
+
+
+async def reply_photo(message: Message, photo, **kwargs) -> Message:
+    """Message.reply_photo going through send_photo."""
+    if message.chat.type != ChatType.PRIVATE:
+        kwargs.setdefault("reply_to_message_id", message.id)
+    return await send_photo(message.chat.id, photo, **kwargs)
@@ -2,7 +2,8 @@ import math
 
 from pyrogram.types import InlineKeyboardButton
 
-from AnonXMusic.utils.formatters import time_to_seconds
+from AnonXMusic.utils.formatters import seconds_to_min, time_to_seconds
+from AnonXMusic.utils.playback import get_played
 
 
 def track_markup(_, videoid, user_id, channel, fplay):
@@ -27,10 +28,12 @@ def track_markup(_, videoid, user_id, channel, fplay):
     return buttons
 
 
-def stream_markup_timer(_, chat_id, played, dur):
-    played_sec = time_to_seconds(played)
+def stream_markup_timer(_, chat_id, track):
+    played_sec = get_played(track)
+    played = seconds_to_min(played_sec)
+    dur = track["dur"]
     duration_sec = time_to_seconds(dur)
-    percentage = (played_sec / duration_sec) * 100
+    percentage = (played_sec / duration_sec) * 100 if duration_sec else 0
     umm = math.floor(percentage)
     if 0 < umm <= 10:
         bar = "◉—————————"
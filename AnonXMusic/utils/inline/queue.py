@@ -45,22 +45,38 @@ def queue_markup(
     return upl
 
 
-def queue_back_markup(_, CPLAY):
-    upl = InlineKeyboardMarkup(
-        [
+def queue_page_markup(_, CPLAY, page, pages):
+    buttons = []
+    if pages > 1:
+        buttons.append(
             [
                 InlineKeyboardButton(
-                    text=_["BACK_BUTTON"],
-                    callback_data=f"queue_back_timer {CPLAY}",
+                    text="◁",
+                    callback_data=f"queue_page {CPLAY}|{(page - 1) % pages}",
+                ),
+                InlineKeyboardButton(
+                    text=f"{page + 1}/{pages}",
+                    callback_data="GetTimer",
                 ),
                 InlineKeyboardButton(
-                    text=_["CLOSE_BUTTON"],
-                    callback_data="close",
+                    text="▷",
+                    callback_data=f"queue_page {CPLAY}|{(page + 1) % pages}",
                 ),
             ]
+        )
+    buttons.append(
+        [
+            InlineKeyboardButton(
+                text=_["BACK_BUTTON"],
+                callback_data=f"queue_back_timer {CPLAY}",
+            ),
+            InlineKeyboardButton(
+                text=_["CLOSE_BUTTON"],
+                callback_data="close",
+            ),
         ]
     )
-    return upl
+    return InlineKeyboardMarkup(buttons)
 
 
 def aq_markup(_, chat_id):
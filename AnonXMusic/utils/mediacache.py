@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict
+
+import config
+from AnonXMusic.logging import LOGGER
+
+# seconds an index change waits for others before the index is written
+SAVE_DELAY = 30
+
+
+class MediaCache:
+    """Keeps the files of a directory under a byte budget, surviving restarts.
+
+    Every file is tracked in a small json index with its size, last access
+    and hit count. Once the directory grows past the budget the least
+    recently (or least frequently) used files are removed, skipping any file
+    which is still referenced by a queue.
+
+    A hit is a lookup served from the cache, a miss a file which had to be
+    fetched into it, counted when it is added.
+    """
+
+    def __init__(self, path: str, limit: int, policy: str = "lru", max_files: int = 0):
+        self.path = path
+        self.limit = limit
+        self.max_files = max_files
+        self.policy = policy.lower()
+        self.index_file = os.path.join(path, "index.json")
+        self.entries: Dict[str, dict] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0
+        self.dirty = False
+        self.timer = None
+
+    def _name(self, file: str) -> str:
+        return os.path.basename(file)
+
+    def contains(self, file: str) -> bool:
+        if os.path.abspath(os.path.dirname(file)) != os.path.abspath(self.path):
+            return False
+        return self._name(file) in self.entries
+
+    def load(self):
+        """Rebuilds the index from disk, keeping the recorded usage of known files."""
+        try:
+            with open(self.index_file) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        known = stored.get("entries", {})
+        self.hits = stored.get("hits", 0)
+        self.misses = stored.get("misses", 0)
+        self.saved = stored.get("saved", 0)
+        self.entries = {}
+        self.size = 0
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        for name in os.listdir(self.path):
+            file = os.path.join(self.path, name)
+            if file == self.index_file or ".temp" in name or name.endswith(".part"):
+                continue
+            if not os.path.isfile(file):
+                continue
+            size = os.path.getsize(file)
+            entry = known.get(name, {})
+            self.entries[name] = {
+                "size": size,
+                "atime": entry.get("atime", os.path.getmtime(file)),
+                "hits": entry.get("hits", 0),
+            }
+            self.size += size
+        self.evict()
+        self.save()
+        LOGGER(__name__).info(
+            f"Cache of {self.path} loaded with {len(self.entries)} files ({self.size} bytes)."
+        )
+
+    def save(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.dirty = False
+        temp = f"{self.index_file}.temp"
+        try:
+            with open(temp, "w") as f:
+                json.dump(
+                    {
+                        "entries": self.entries,
+                        "hits": self.hits,
+                        "misses": self.misses,
+                        "saved": self.saved,
+                    },
+                    f,
+                )
+            os.replace(temp, self.index_file)
+        except OSError as e:
+            LOGGER(__name__).warning(f"Failed to save media cache index: {e}")
+
+    def lookup(self, file: str, verify: bool = True) -> bool:
+        """Returns True and records a hit if `file` is cached on disk.
+
+        With `verify` False only the in-memory index is consulted.
+        """
+        entry = self.entries.get(self._name(file))
+        if entry and (not verify or os.path.isfile(file)):
+            entry["atime"] = time.time()
+            entry["hits"] += 1
+            self.hits += 1
+            self.saved += entry["size"]
+            return True
+        if entry:
+            self._drop(self._name(file))
+        return False
+
+    def add(self, file: str):
+        name = self._name(file)
+        if name in self.entries:
+            self.size -= self.entries[name]["size"]
+        size = os.path.getsize(file)
+        self.entries[name] = {"size": size, "atime": time.time(), "hits": 0}
+        self.size += size
+        self.misses += 1
+        self.evict(keep=name)
+        self.save_later()
+
+    def save_later(self):
+        """Writes the index once SAVE_DELAY passed, batching the changes made meanwhile."""
+        self.dirty = True
+        if self.timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.save()
+        self.timer = loop.call_later(SAVE_DELAY, self._flush)
+
+    def _flush(self):
+        self.timer = None
+        if self.dirty:
+            self.save()
+
+    def _drop(self, name: str):
+        entry = self.entries.pop(name, None)
+        if entry:
+            self.size -= entry["size"]
+
+    def _busy(self) -> set:
+        return {os.path.basename(str(file)) for file in config.autoclean}
+
+    def _full(self) -> bool:
+        if self.max_files and len(self.entries) > self.max_files:
+            return True
+        return self.size > self.limit
+
+    def evict(self, keep: str = None):
+        if not self._full():
+            return
+        busy = self._busy()
+        busy.add(keep)
+        if self.policy == "lfu":
+            key = lambda name: (self.entries[name]["hits"], self.entries[name]["atime"])
+        else:
+            key = lambda name: self.entries[name]["atime"]
+        for name in sorted(self.entries, key=key):
+            if not self._full():
+                break
+            if name in busy:
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            self._drop(name)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self.entries),
+            "size": self.size,
+            "limit": self.limit,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits * 100 / lookups, 2) if lookups else 0,
+            "saved": self.saved,
+        }
+
+
+media_cache = MediaCache("downloads", config.CACHE_SIZE_LIMIT, config.CACHE_EVICTION)
@@ -0,0 +1,71 @@
+import asyncio
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from AnonXMusic.core.http import http
+from AnonXMusic.utils.ttlcache import TTLCache
+
+# the meta tags of a page are all in <head>, give up on pages with a huge one
+HEAD_LIMIT = 1024 * 1024
+
+# url -> meta tags of the page
+pages = TTLCache(600, maxsize=256)
+
+
+class HeadParser(HTMLParser):
+    """Collects the property/name -> content pairs of <meta> tags up to </head>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, List[str]] = {}
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("property") or attrs.get("name")
+            if key and attrs.get("content") is not None:
+                self.meta.setdefault(key, []).append(attrs["content"])
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+
+def parse_meta(html: str) -> Dict[str, List[str]]:
+    parser = HeadParser()
+    parser.feed(html)
+    return parser.meta
+
+
+async def fetch_meta(url: str) -> Optional[Dict[str, List[str]]]:
+    """Returns the meta tags of `url`, or None if the page could not be fetched.
+
+    Only the page up to </head> is downloaded, with the retries of
+    http.request, and it is parsed off the event loop. Results are cached per url for ten minutes.
+    """
+    meta = pages.get(url)
+    if meta is not None:
+        return meta
+    head = b""
+    resp = await http.request("GET", url, stream=True)
+    async with resp:
+        if resp.status != 200:
+            return None
+        async for chunk in resp.content.iter_chunked(16384):
+            head += chunk
+            end = head.lower().find(b"</head>", max(0, len(head) - len(chunk) - 7))
+            if end != -1:
+                head = head[: end + 7]
+                break
+            if len(head) > HEAD_LIMIT:
+                break
+        charset = resp.charset or "utf-8"
+    html = head.decode(charset, errors="replace")
+    meta = await asyncio.get_running_loop().run_in_executor(None, parse_meta, html)
+    pages.set(url, meta)
+    return meta
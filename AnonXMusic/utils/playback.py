@@ -0,0 +1,48 @@
+import time
+
+# Every playing track keeps a clock instead of a counter ticked each second:
+#   "started"    monotonic time the current position was taken at
+#   "position"   seconds of the file already played at "started"
+#   "paused_at"  monotonic time of the pause, None while playing
+#   "paused_for" seconds spent paused since "started"
+#   "speed"      playback speed, the file itself is re-encoded for it
+# The played time is worked out from these whenever it is read.
+
+
+def start_track(track: dict, position: int = 0):
+    """Starts the clock of a track which begins playing at `position` seconds."""
+    track["started"] = time.monotonic()
+    track["position"] = position
+    track["paused_at"] = None
+    track["paused_for"] = 0
+
+
+def pause_track(track: dict):
+    if track.get("started") is not None and track.get("paused_at") is None:
+        track["paused_at"] = time.monotonic()
+
+
+def resume_track(track: dict):
+    paused_at = track.get("paused_at")
+    if paused_at is not None:
+        track["paused_for"] += time.monotonic() - paused_at
+        track["paused_at"] = None
+
+
+def get_played(track: dict) -> int:
+    """Returns the seconds of the current file played so far."""
+    started = track.get("started")
+    if started is None:
+        return 0
+    now = track["paused_at"] or time.monotonic()
+    played = int(track["position"] + now - started - track["paused_for"])
+    duration = int(track.get("seconds") or 0)
+    if duration:
+        played = min(played, duration)
+    return max(played, 0)
+
+
+def speed_position(track: dict, speed) -> int:
+    """Returns where a file re-encoded for `speed` has to start to continue the track."""
+    current = float(track.get("speed") or 1.0)
+    return int(get_played(track) * current / float(speed))
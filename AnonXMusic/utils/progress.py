@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from pyrogram.errors import FloodWait
+from pyrogram.types import InlineKeyboardMarkup
+
+from AnonXMusic import app
+from AnonXMusic.utils.formatters import convert_bytes, get_readable_time
+from strings import get_string
+
+# seconds between two edits of the same progress message
+INTERVAL = 5
+
+
+class ProgressReporter:
+    """Shows download progress in a message, editing it at most once per INTERVAL.
+
+    Calling the reporter costs a clock read and a comparison, so it can be
+    handed to pyrogram as a per-chunk progress callback. Edits run in the
+    background, only one at a time, and a FloodWait postpones the next one
+    for as long as Telegram asks.
+    """
+
+    def __init__(
+        self,
+        mystic,
+        _=None,
+        markup: InlineKeyboardMarkup = None,
+        interval: float = INTERVAL,
+    ):
+        self.mystic = mystic
+        self._ = _ or get_string("en")
+        self.markup = markup
+        self.interval = interval
+        self.start = time.monotonic()
+        self.next = self.start + 1
+        self.task = None
+        self.closed = False
+
+    async def __call__(self, current: int, total: int):
+        now = time.monotonic()
+        if now < self.next or self.closed or not total or current >= total:
+            return
+        if self.task and not self.task.done():
+            return
+        self.next = now + self.interval
+        self.task = asyncio.ensure_future(self._edit(current, total, now))
+
+    async def event(self, event: dict):
+        """Progress callback for yt-dlp downloads."""
+        await self(event["downloaded"], event["total"])
+
+    async def _edit(self, current: int, total: int, now: float):
+        elapsed = now - self.start
+        speed = current / elapsed if elapsed else 0
+        eta = get_readable_time(int((total - current) / speed)) if speed else ""
+        text = self._["tg_1"].format(
+            app.mention,
+            convert_bytes(total),
+            convert_bytes(current),
+            round(current * 100 / total, 2),
+            convert_bytes(speed),
+            eta or "0 sᴇᴄᴏɴᴅs",
+        )
+        try:
+            await self.mystic.edit_text(text, reply_markup=self.markup)
+        except FloodWait as fw:
+            self.next = time.monotonic() + int(fw.value)
+        except:
+            pass
+
+    def close(self):
+        self.closed = True
+        if self.task and not self.task.done():
+            self.task.cancel()
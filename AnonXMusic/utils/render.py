@@ -0,0 +1,91 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from PIL import ImageFont
+
+import config
+from AnonXMusic.logging import LOGGER
+
+FONTS = {
+    "font": "AnonXMusic/assets/font.ttf",
+    "font2": "AnonXMusic/assets/font2.ttf",
+}
+# (font, size) pairs loaded by every worker before its first job
+PRELOAD = [("font", 30), ("font2", 30), ("font", 28)]
+
+_fonts: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+# name -> function building a reusable image layer, see template()
+_builders: Dict[str, Callable[[], Any]] = {}
+_templates: Dict[str, Any] = {}
+_pool = None
+
+
+def font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """Returns a font of the assets, loaded once per worker process."""
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = ImageFont.truetype(FONTS[name], size)
+    return _fonts[key]
+
+
+def register_template(name: str, builder: Callable[[], Any]):
+    """Registers a layer which every worker builds once when it starts."""
+    _builders[name] = builder
+
+
+def template(name: str) -> Any:
+    if name not in _templates:
+        _templates[name] = _builders[name]()
+    return _templates[name]
+
+
+def _init():
+    for name, size in PRELOAD:
+        font(name, size)
+    for name in _builders:
+        template(name)
+
+
+def start():
+    """Forks the render workers, called at startup before any thread is running.
+
+    Forked workers inherit the loaded modules instead of importing the bot
+    again, which is only safe while the process is single threaded: a lock
+    held by another thread at fork time stays locked in the worker forever.
+    """
+    global _pool
+    if _pool is not None:
+        return
+    if threading.active_count() > 1:
+        LOGGER(__name__).warning(
+            f"Forking render workers with {threading.active_count()} threads running"
+        )
+    _pool = ProcessPoolExecutor(
+        max_workers=config.RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init,
+    )
+    # with fork every worker is started by the first job, before the
+    # executor starts its own management thread
+    _pool.submit(int)
+
+
+def pool() -> ProcessPoolExecutor:
+    if _pool is None:
+        start()
+    return _pool
+
+
+async def render(func: Callable, *args):
+    """Runs an image rendering function in the worker pool."""
+    return await asyncio.get_running_loop().run_in_executor(pool(), func, *args)
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -1,18 +1,69 @@
 import os
 
+from AnonXMusic.utils.mediacache import media_cache
 from config import autoclean
 
+# queue placeholders which never point to a file on disk
+virtual = ("vid_", "live_", "index_")
+
+
+def retain(file):
+    autoclean[file] = autoclean.get(file, 0) + 1
+
+
+def release(file) -> bool:
+    count = autoclean.get(file, 0) - 1
+    if count > 0:
+        autoclean[file] = count
+        return False
+    autoclean.pop(file, None)
+    return True
+
+
+def swap_file(track, file):
+    """Points a queued track at its downloaded file, moving the reference along."""
+    old = track["file"]
+    if old == file:
+        return
+    retain(file)
+    track["file"] = file
+    release(old)
+
+
+def pin(track, file):
+    """Makes `track` hold the background download of the remote stream it plays.
+
+    The reference was taken by YouTube.download and is released with the
+    track, so the file can not be evicted before a fallback or a seek needs it.
+    """
+    old = track["pinned"]
+    track["pinned"] = file
+    if old:
+        release(old)
+
 
 async def auto_clean(popped):
+    try:
+        pinned = popped["pinned"]
+        if pinned and release(pinned) and media_cache.contains(pinned):
+            media_cache.evict()
+    except:
+        pass
     try:
         rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+        if not release(rem):
+            return
+        if media_cache.contains(rem):
+            return media_cache.evict()
+        if not any(rem.startswith(x) for x in virtual):
+            try:
+                os.remove(rem)
+            except:
+                pass
     except:
         pass
+
+
+async def clean_queue(queue):
+    for track in queue or []:
+        await auto_clean(track)
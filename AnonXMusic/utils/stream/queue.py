@@ -1,9 +1,18 @@
 import asyncio
 from typing import Union
 
+from AnonXMusic.core.queue import ChatQueue, Track
 from AnonXMusic.misc import db
 from AnonXMusic.utils.formatters import check_duration, seconds_to_min
-from config import autoclean, time_to_seconds
+from AnonXMusic.utils.playback import start_track
+from AnonXMusic.utils.stream.autoclear import retain
+from config import time_to_seconds
+
+
+def queue_snapshot(chat_id) -> tuple:
+    """Returns the tracks of a chat, copied once per change of its queue."""
+    queue = db.get(chat_id)
+    return queue.snapshot() if queue else ()
 
 
 async def put_queue(
@@ -23,28 +32,28 @@ async def put_queue(
         duration_in_seconds = time_to_seconds(duration) - 3
     except:
         duration_in_seconds = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "user_id": user_id,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": duration_in_seconds,
-        "played": 0,
-    }
+    put = Track(
+        title=title,
+        dur=duration,
+        streamtype=stream,
+        by=user,
+        user_id=user_id,
+        chat_id=original_chat_id,
+        file=file,
+        vidid=vidid,
+        seconds=duration_in_seconds,
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
-            check.insert(0, put)
+            check.push_front(put)
         else:
-            db[chat_id] = []
-            db[chat_id].append(put)
+            db[chat_id] = ChatQueue([put])
     else:
         db[chat_id].append(put)
-    autoclean.append(file)
+    if db[chat_id][0] is put:
+        start_track(put)
+    retain(file)
 
 
 async def put_queue_index(
@@ -69,23 +78,23 @@ async def put_queue_index(
             dur = 0
     else:
         dur = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": dur,
-        "played": 0,
-    }
+    put = Track(
+        title=title,
+        dur=duration,
+        streamtype=stream,
+        by=user,
+        chat_id=original_chat_id,
+        file=file,
+        vidid=vidid,
+        seconds=dur,
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
-            check.insert(0, put)
+            check.push_front(put)
         else:
-            db[chat_id] = []
-            db[chat_id].append(put)
+            db[chat_id] = ChatQueue([put])
     else:
         db[chat_id].append(put)
+    if db[chat_id][0] is put:
+        start_track(put)
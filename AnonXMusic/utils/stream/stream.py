@@ -1,20 +1,445 @@
+import asyncio
 import os
-from random import randint
-from typing import Union
+import time
+from typing import Awaitable, Callable, Dict, List, Union
 
 from pyrogram.types import InlineKeyboardMarkup
 
 import config
 from AnonXMusic import Carbon, YouTube, app
 from AnonXMusic.core.call import Anony
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.core.queue import ChatQueue
 from AnonXMusic.misc import db
-from AnonXMusic.utils.database import add_active_video_chat, is_active_chat
+from AnonXMusic.platforms.Youtube import resolve
+from AnonXMusic.utils.bars import watch_player
+from AnonXMusic.utils.database import is_active_chat
 from AnonXMusic.utils.exceptions import AssistantErr
+from AnonXMusic.utils.fileids import send_photo
+from AnonXMusic.utils.formatters import time_to_seconds
 from AnonXMusic.utils.inline import aq_markup, close_markup, stream_markup
 from AnonXMusic.utils.pastebin import AnonyBin
+from AnonXMusic.utils.playback import start_track
+from AnonXMusic.utils.stream.autoclear import clean_queue, pin
 from AnonXMusic.utils.stream.queue import put_queue, put_queue_index
 from AnonXMusic.utils.thumbnails import get_thumb
 
+# A play request goes through these stages for every track it adds:
+#   resolve   turn the request into title, duration and ids
+#   fetch     get something the player can read, a file or a stream url
+#   enqueue   put the track in the chat's queue
+#   join      start the call when nothing was playing
+#   announce  tell the chat what is playing or where it was queued
+STAGES = ("resolve", "fetch", "enqueue", "join", "announce")
+
+# stage -> functions awaited with (play, item) once the stage succeeded
+hooks: Dict[str, List[Callable[["Play", "Item"], Awaitable[None]]]] = {
+    stage: [] for stage in STAGES
+}
+# source -> stage -> {"count", "total_ms", "max_ms"}
+timings: Dict[str, Dict[str, dict]] = {}
+
+
+def add_hook(stage: str, func: Callable[["Play", "Item"], Awaitable[None]]):
+    """Runs `func` after `stage` for every track, to prefetch or cache what it needs."""
+    hooks[stage].append(func)
+
+
+def stage_stats() -> Dict[str, Dict[str, dict]]:
+    stats = {}
+    for source, stages in timings.items():
+        stats[source] = {
+            stage: {
+                "count": t["count"],
+                "avg_ms": round(t["total_ms"] / t["count"], 1),
+                "max_ms": round(t["max_ms"], 1),
+            }
+            for stage, t in stages.items()
+        }
+    return stats
+
+
+class Item:
+    """A track on its way through the stages."""
+
+    def __init__(self, source: str, title: str, duration_min, vidid, **kwargs):
+        self.source = source
+        self.title = title
+        self.duration_min = duration_min
+        self.vidid = vidid
+        self.thumb = kwargs.get("thumb")
+        self.link = kwargs.get("link")
+        # what the queue stores and what the player reads now
+        self.file = kwargs.get("file")
+        self.path = kwargs.get("path", self.file)
+        self.video = kwargs.get("video")
+        # now playing card, None for a generated thumbnail
+        self.image = kwargs.get("image")
+        self.info = kwargs.get("info")
+        self.markup = kwargs.get("markup", "tg")
+        self.track = None
+        self.position = 0
+        # background download held for the remote url in item.path
+        self.pinned = None
+
+
+class Play:
+    """One call of stream(), with the timing of every stage it ran."""
+
+    def __init__(
+        self,
+        _,
+        mystic,
+        user_id,
+        chat_id,
+        user_name,
+        original_chat_id,
+        video,
+        forceplay,
+        streamtype,
+        spotify,
+    ):
+        self._ = _
+        self.mystic = mystic
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.user_name = user_name
+        self.original_chat_id = original_chat_id
+        self.video = True if video else None
+        self.forceplay = forceplay
+        self.playlist = streamtype == "playlist"
+        self.spotify = spotify
+        # timings are kept apart for spotify and apple playlists which search youtube
+        self.source = "spotify" if self.playlist and spotify else streamtype
+        self.spent: Dict[str, float] = {}
+
+    async def stage(self, stage: str, func: Callable, item, *args):
+        start = time.perf_counter()
+        try:
+            result = await func(self, item, *args)
+        finally:
+            self._record(stage, (time.perf_counter() - start) * 1000)
+        target = result if stage == "resolve" else item
+        if target is None:
+            return result
+        for hook in hooks[stage]:
+            try:
+                await hook(self, target)
+            except Exception as e:
+                LOGGER(__name__).warning(f"{stage} hook {hook.__name__} failed: {e}")
+        return result
+
+    def _record(self, stage: str, ms: float):
+        self.spent[stage] = self.spent.get(stage, 0) + ms
+        t = timings.setdefault(self.source, {}).setdefault(
+            stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        t["count"] += 1
+        t["total_ms"] += ms
+        t["max_ms"] = max(t["max_ms"], ms)
+
+    def log(self):
+        spent = ", ".join(
+            f"{stage} {round(self.spent[stage])}ms"
+            for stage in STAGES
+            if stage in self.spent
+        )
+        LOGGER(__name__).info(f"{self.source} play in {self.chat_id} : {spent}")
+
+
+async def resolve_item(play: Play, streamtype: str, result) -> Item:
+    if streamtype == "youtube":
+        vidid = result["vidid"]
+        return Item(
+            "youtube",
+            (result["title"]).title(),
+            result["duration_min"],
+            vidid,
+            thumb=result["thumb"],
+            link=result["link"],
+            video=play.video,
+            info=f"https://t.me/{app.username}?start=info_{vidid}",
+            markup="stream",
+        )
+    if streamtype == "soundcloud":
+        return Item(
+            "soundcloud",
+            result["title"],
+            result["duration_min"],
+            "soundcloud",
+            file=result["filepath"],
+            image=config.SOUNCLOUD_IMG_URL,
+            info=config.SUPPORT_CHAT,
+        )
+    if streamtype == "telegram":
+        return Item(
+            "telegram",
+            (result["title"]).title(),
+            result["dur"],
+            "telegram",
+            file=result["path"],
+            link=result["link"],
+            video=play.video,
+            image=(
+                config.TELEGRAM_VIDEO_URL if play.video else config.TELEGRAM_AUDIO_URL
+            ),
+            info=result["link"],
+        )
+    if streamtype == "live":
+        vidid = result["vidid"]
+        return Item(
+            "live",
+            (result["title"]).title(),
+            "Live Track",
+            vidid,
+            thumb=result["thumb"],
+            link=result["link"],
+            file=f"live_{vidid}",
+            video=play.video,
+            info=f"https://t.me/{app.username}?start=info_{vidid}",
+        )
+    if streamtype == "index":
+        return Item(
+            "index",
+            "ɪɴᴅᴇx ᴏʀ ᴍ3ᴜ8 ʟɪɴᴋ",
+            "00:00",
+            result,
+            file="index_url",
+            path=result,
+            video=play.video,
+            image=config.STREAM_IMG_URL,
+        )
+    raise ValueError(f"Unknown stream type {streamtype}")
+
+
+async def resolve_search(play: Play, search) -> Union[Item, None]:
+    """Resolves one entry of a playlist, None when it can not be played."""
+    try:
+        if play.spotify:
+            details = await resolve(search)
+            title = details["title"]
+            duration_min = details["duration_min"]
+            duration_sec = time_to_seconds(duration_min) if duration_min else 0
+            thumbnail = details["thumb"]
+            vidid = details["vidid"]
+        else:
+            (
+                title,
+                duration_min,
+                duration_sec,
+                thumbnail,
+                vidid,
+            ) = await YouTube.details(search, True)
+    except:
+        return None
+    if str(duration_min) == "None":
+        return None
+    if duration_sec > config.DURATION_LIMIT:
+        return None
+    return Item(
+        "youtube",
+        title,
+        duration_min,
+        vidid,
+        thumb=thumbnail,
+        file=f"vid_{vidid}",
+        video=play.video,
+        info=f"https://t.me/{app.username}?start=info_{vidid}",
+        markup="stream",
+    )
+
+
+async def fetch(play: Play, item: Item, playing: bool):
+    if item.source == "youtube" and (playing or not play.playlist):
+        try:
+            file_path, direct = await YouTube.download(
+                item.vidid, play.mystic, videoid=True, video=item.video, _=play._
+            )
+        except:
+            raise AssistantErr(play._["play_14"])
+        item.path = file_path
+        item.file = file_path if direct else f"vid_{item.vidid}"
+        if not direct:
+            item.pinned = YouTube.path(item.vidid, item.video)
+    elif item.source == "live" and playing:
+        n, file_path = await YouTube.video(item.link)
+        if n == 0:
+            raise AssistantErr(play._["str_3"])
+        item.path = file_path
+
+
+async def enqueue(play: Play, item: Item, playing: bool):
+    chat_id = play.chat_id
+    if playing and not play.forceplay:
+        # busy() found no tracks waiting, whatever is left here is empty
+        db[chat_id] = ChatQueue()
+    stream = "video" if item.video else "audio"
+    if item.source == "index":
+        await put_queue_index(
+            chat_id,
+            play.original_chat_id,
+            item.file,
+            item.title,
+            item.duration_min,
+            play.user_name,
+            item.vidid,
+            stream,
+            forceplay=play.forceplay if playing else None,
+        )
+    else:
+        await put_queue(
+            chat_id,
+            play.original_chat_id,
+            item.file,
+            item.title,
+            item.duration_min,
+            play.user_name,
+            item.vidid,
+            play.user_id,
+            stream,
+            forceplay=play.forceplay if playing else None,
+        )
+    item.position = 0 if playing else len(db[chat_id]) - 1
+    item.track = db[chat_id][item.position]
+    if item.pinned:
+        pin(item.track, item.pinned)
+
+
+async def join(play: Play, item: Item):
+    chat_id = play.chat_id
+    try:
+        await Anony.join_call(
+            chat_id,
+            play.original_chat_id,
+            item.path,
+            video=item.video,
+            image=item.thumb,
+        )
+    except:
+        queue = db.get(chat_id)
+        if queue and queue[0] is item.track:
+            # nothing plays the tracks a forceplay kept behind it either
+            db[chat_id] = ChatQueue()
+            await clean_queue(queue)
+        raise
+    # the clock runs from the moment the call actually plays
+    start_track(item.track)
+
+
+async def announce(play: Play, item: Item, playing: bool):
+    _ = play._
+    chat_id = play.chat_id
+    if not playing:
+        text = _["queue_4"].format(
+            item.position, item.title[:27], item.duration_min, play.user_name
+        )
+        button = aq_markup(_, chat_id)
+        if item.source == "index":
+            return await play.mystic.edit_text(
+                text=text, reply_markup=InlineKeyboardMarkup(button)
+            )
+        return await app.send_message(
+            chat_id=play.original_chat_id,
+            text=text,
+            reply_markup=InlineKeyboardMarkup(button),
+        )
+    if item.source == "index":
+        caption = _["stream_2"].format(play.user_name)
+    else:
+        caption = _["stream_1"].format(
+            item.info, item.title[:23], item.duration_min, play.user_name
+        )
+    button = stream_markup(_, chat_id)
+    run = await send_photo(
+        play.original_chat_id,
+        photo=item.image or await get_thumb(item.vidid),
+        caption=caption,
+        reply_markup=InlineKeyboardMarkup(button),
+    )
+    db[chat_id][0]["mystic"] = run.id
+    db[chat_id][0]["markup"] = item.markup
+    watch_player(chat_id, run, _)
+    if item.source == "index":
+        await play.mystic.delete()
+
+
+async def busy(play: Play) -> bool:
+    """True when the chat plays or has tracks waiting, so a new one is only queued."""
+    if await is_active_chat(play.chat_id):
+        return True
+    return bool(db.get(play.chat_id)) and not play.forceplay
+
+
+async def play_item(play: Play, item: Item) -> bool:
+    """Runs a resolved track through the remaining stages, True if it plays now."""
+    playing = not await busy(play)
+    await play.stage("fetch", fetch, item, playing)
+    # another play may have started the call while this one was fetching
+    if playing and await busy(play):
+        if play.forceplay:
+            await Anony.force_stop_stream(play.chat_id)
+        else:
+            playing = False
+    await play.stage("enqueue", enqueue, item, playing)
+    if playing:
+        await play.stage("join", join, item)
+    if playing or not play.playlist:
+        await play.stage("announce", announce, item, playing)
+    return playing
+
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+
+async def play_list(play: Play, result):
+    _ = play._
+    msg = f"{_['play_19']}\n\n"
+    count = 0
+    position = 0
+    if not hasattr(result, "__aiter__"):
+        result = iterate(result)
+    try:
+        async for search in result:
+            if int(count) == config.PLAYLIST_FETCH_LIMIT:
+                break
+            item = await play.stage("resolve", resolve_search, search)
+            if item is None:
+                continue
+            if await play_item(play, item):
+                continue
+            position = item.position
+            count += 1
+            msg += f"{count}. {item.title[:70]}\n"
+            msg += f"{_['play_20']} {position}\n\n"
+    finally:
+        await result.aclose()
+    if count == 0:
+        return
+    link = await AnonyBin(msg)
+    lines = msg.count("\n")
+    if lines >= 17:
+        car = os.linesep.join(msg.split(os.linesep)[:17])
+    else:
+        car = msg
+    carbon = await Carbon.generate(car)
+    return await send_photo(
+        play.original_chat_id,
+        photo=carbon,
+        caption=_["play_21"].format(position, link),
+        reply_markup=close_markup(_),
+    )
+
+
+async def prefetch_thumb(play: Play, item: Item):
+    """Renders the thumbnail of a queued track now, so its turn starts without the wait."""
+    if item.position and item.image is None:
+        asyncio.ensure_future(get_thumb(item.vidid))
+
+
+add_hook("enqueue", prefetch_thumb)
+
 
 async def stream(
     _,
@@ -31,390 +456,24 @@ async def stream(
 ):
     if not result:
         return
+    play = Play(
+        _,
+        mystic,
+        user_id,
+        chat_id,
+        user_name,
+        original_chat_id,
+        video,
+        forceplay,
+        streamtype,
+        spotify,
+    )
     if forceplay:
         await Anony.force_stop_stream(chat_id)
-    if streamtype == "playlist":
-        msg = f"{_['play_19']}\n\n"
-        count = 0
-        for search in result:
-            if int(count) == config.PLAYLIST_FETCH_LIMIT:
-                continue
-            try:
-                (
-                    title,
-                    duration_min,
-                    duration_sec,
-                    thumbnail,
-                    vidid,
-                ) = await YouTube.details(search, False if spotify else True)
-            except:
-                continue
-            if str(duration_min) == "None":
-                continue
-            if duration_sec > config.DURATION_LIMIT:
-                continue
-            if await is_active_chat(chat_id):
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                )
-                position = len(db.get(chat_id)) - 1
-                count += 1
-                msg += f"{count}. {title[:70]}\n"
-                msg += f"{_['play_20']} {position}\n\n"
-            else:
-                if not forceplay:
-                    db[chat_id] = []
-                status = True if video else None
-                try:
-                    file_path, direct = await YouTube.download(
-                        vidid, mystic, video=status, videoid=True
-                    )
-                except:
-                    raise AssistantErr(_["play_14"])
-                await Anony.join_call(
-                    chat_id,
-                    original_chat_id,
-                    file_path,
-                    video=status,
-                    image=thumbnail,
-                )
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    file_path if direct else f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                    forceplay=forceplay,
-                )
-                img = await get_thumb(vidid)
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(
-                    original_chat_id,
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{vidid}",
-                        title[:23],
-                        duration_min,
-                        user_name,
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
-                )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
-        if count == 0:
-            return
-        else:
-            link = await AnonyBin(msg)
-            lines = msg.count("\n")
-            if lines >= 17:
-                car = os.linesep.join(msg.split(os.linesep)[:17])
-            else:
-                car = msg
-            carbon = await Carbon.generate(car, randint(100, 10000000))
-            upl = close_markup(_)
-            return await app.send_photo(
-                original_chat_id,
-                photo=carbon,
-                caption=_["play_21"].format(position, link),
-                reply_markup=upl,
-            )
-    elif streamtype == "youtube":
-        link = result["link"]
-        vidid = result["vidid"]
-        title = (result["title"]).title()
-        duration_min = result["duration_min"]
-        thumbnail = result["thumb"]
-        status = True if video else None
-        try:
-            file_path, direct = await YouTube.download(
-                vidid, mystic, videoid=True, video=status
-            )
-        except:
-            raise AssistantErr(_["play_14"])
-        if await is_active_chat(chat_id):
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path if direct else f"vid_{vidid}",
-                title,
-                duration_min,
-                user_name,
-                vidid,
-                user_id,
-                "video" if video else "audio",
-            )
-            position = len(db.get(chat_id)) - 1
-            button = aq_markup(_, chat_id)
-            await app.send_message(
-                chat_id=original_chat_id,
-                text=_["queue_4"].format(position, title[:27], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-        else:
-            if not forceplay:
-                db[chat_id] = []
-            await Anony.join_call(
-                chat_id,
-                original_chat_id,
-                file_path,
-                video=status,
-                image=thumbnail,
-            )
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path if direct else f"vid_{vidid}",
-                title,
-                duration_min,
-                user_name,
-                vidid,
-                user_id,
-                "video" if video else "audio",
-                forceplay=forceplay,
-            )
-            img = await get_thumb(vidid)
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(
-                original_chat_id,
-                photo=img,
-                caption=_["stream_1"].format(
-                    f"https://t.me/{app.username}?start=info_{vidid}",
-                    title[:23],
-                    duration_min,
-                    user_name,
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "stream"
-    elif streamtype == "soundcloud":
-        file_path = result["filepath"]
-        title = result["title"]
-        duration_min = result["duration_min"]
-        if await is_active_chat(chat_id):
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path,
-                title,
-                duration_min,
-                user_name,
-                streamtype,
-                user_id,
-                "audio",
-            )
-            position = len(db.get(chat_id)) - 1
-            button = aq_markup(_, chat_id)
-            await app.send_message(
-                chat_id=original_chat_id,
-                text=_["queue_4"].format(position, title[:27], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-        else:
-            if not forceplay:
-                db[chat_id] = []
-            await Anony.join_call(chat_id, original_chat_id, file_path, video=None)
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path,
-                title,
-                duration_min,
-                user_name,
-                streamtype,
-                user_id,
-                "audio",
-                forceplay=forceplay,
-            )
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(
-                original_chat_id,
-                photo=config.SOUNCLOUD_IMG_URL,
-                caption=_["stream_1"].format(
-                    config.SUPPORT_CHAT, title[:23], duration_min, user_name
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
-    elif streamtype == "telegram":
-        file_path = result["path"]
-        link = result["link"]
-        title = (result["title"]).title()
-        duration_min = result["dur"]
-        status = True if video else None
-        if await is_active_chat(chat_id):
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path,
-                title,
-                duration_min,
-                user_name,
-                streamtype,
-                user_id,
-                "video" if video else "audio",
-            )
-            position = len(db.get(chat_id)) - 1
-            button = aq_markup(_, chat_id)
-            await app.send_message(
-                chat_id=original_chat_id,
-                text=_["queue_4"].format(position, title[:27], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-        else:
-            if not forceplay:
-                db[chat_id] = []
-            await Anony.join_call(chat_id, original_chat_id, file_path, video=status)
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                file_path,
-                title,
-                duration_min,
-                user_name,
-                streamtype,
-                user_id,
-                "video" if video else "audio",
-                forceplay=forceplay,
-            )
-            if video:
-                await add_active_video_chat(chat_id)
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(
-                original_chat_id,
-                photo=config.TELEGRAM_VIDEO_URL if video else config.TELEGRAM_AUDIO_URL,
-                caption=_["stream_1"].format(link, title[:23], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
-    elif streamtype == "live":
-        link = result["link"]
-        vidid = result["vidid"]
-        title = (result["title"]).title()
-        thumbnail = result["thumb"]
-        duration_min = "Live Track"
-        status = True if video else None
-        if await is_active_chat(chat_id):
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                f"live_{vidid}",
-                title,
-                duration_min,
-                user_name,
-                vidid,
-                user_id,
-                "video" if video else "audio",
-            )
-            position = len(db.get(chat_id)) - 1
-            button = aq_markup(_, chat_id)
-            await app.send_message(
-                chat_id=original_chat_id,
-                text=_["queue_4"].format(position, title[:27], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-        else:
-            if not forceplay:
-                db[chat_id] = []
-            n, file_path = await YouTube.video(link)
-            if n == 0:
-                raise AssistantErr(_["str_3"])
-            await Anony.join_call(
-                chat_id,
-                original_chat_id,
-                file_path,
-                video=status,
-                image=thumbnail if thumbnail else None,
-            )
-            await put_queue(
-                chat_id,
-                original_chat_id,
-                f"live_{vidid}",
-                title,
-                duration_min,
-                user_name,
-                vidid,
-                user_id,
-                "video" if video else "audio",
-                forceplay=forceplay,
-            )
-            img = await get_thumb(vidid)
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(
-                original_chat_id,
-                photo=img,
-                caption=_["stream_1"].format(
-                    f"https://t.me/{app.username}?start=info_{vidid}",
-                    title[:23],
-                    duration_min,
-                    user_name,
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
-    elif streamtype == "index":
-        link = result
-        title = "ɪɴᴅᴇx ᴏʀ ᴍ3ᴜ8 ʟɪɴᴋ"
-        duration_min = "00:00"
-        if await is_active_chat(chat_id):
-            await put_queue_index(
-                chat_id,
-                original_chat_id,
-                "index_url",
-                title,
-                duration_min,
-                user_name,
-                link,
-                "video" if video else "audio",
-            )
-            position = len(db.get(chat_id)) - 1
-            button = aq_markup(_, chat_id)
-            await mystic.edit_text(
-                text=_["queue_4"].format(position, title[:27], duration_min, user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-        else:
-            if not forceplay:
-                db[chat_id] = []
-            await Anony.join_call(
-                chat_id,
-                original_chat_id,
-                link,
-                video=True if video else None,
-            )
-            await put_queue_index(
-                chat_id,
-                original_chat_id,
-                "index_url",
-                title,
-                duration_min,
-                user_name,
-                link,
-                "video" if video else "audio",
-                forceplay=forceplay,
-            )
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(
-                original_chat_id,
-                photo=config.STREAM_IMG_URL,
-                caption=_["stream_2"].format(user_name),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
-            await mystic.delete()
+    try:
+        if streamtype == "playlist":
+            return await play_list(play, result)
+        item = await play.stage("resolve", resolve_item, streamtype, result)
+        await play_item(play, item)
+    finally:
+        play.log()
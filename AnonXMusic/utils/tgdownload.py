@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from pyrogram.errors import FloodWait
+
+import config
+from AnonXMusic import app
+from AnonXMusic.core.userbot import assistants
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.database import assistantdict, get_active_chats, get_client
+from AnonXMusic.utils.formatters import convert_bytes
+
+# pyrogram streams media in chunks of this size, offsets and limits count chunks
+CHUNK = 1024 * 1024
+# chunks fetched by one request range
+PART = 8
+# tries of a single range before the whole download is given up
+RANGE_RETRIES = 5
+
+
+async def _clients(message) -> List[tuple]:
+    """Returns (name, client, message) for every connection allowed to fetch the media."""
+    clients = [("bot", app, message)]
+    if not config.TG_DOWNLOAD_ASSISTANTS:
+        return clients
+    busy = {assistantdict.get(chat_id) for chat_id in await get_active_chats()}
+    for number in assistants:
+        if number in busy:
+            continue
+        client = await get_client(number)
+        try:
+            # file references belong to the account, fetch the message as the assistant
+            own = await client.get_messages(message.chat.id, message.id)
+            if own and own.media:
+                clients.append((f"assistant {number}", client, own))
+        except Exception:
+            continue
+    return clients
+
+
+async def parallel_download(
+    message,
+    path: str,
+    size: int,
+    progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+) -> dict:
+    """Downloads the media of `message` to `path` over several connections.
+
+    The file is split into ranges of PART chunks which the connections take
+    from a shared queue, each range is written at its own offset of a
+    preallocated file with positional writes. Returns the throughput of
+    every connection.
+    """
+    loop = asyncio.get_running_loop()
+    clients = await _clients(message)
+    chunks = (size + CHUNK - 1) // CHUNK
+    ranges = asyncio.Queue()
+    for offset in range(0, chunks, PART):
+        ranges.put_nowait((offset, min(PART, chunks - offset)))
+    workers = []
+    for name, client, msg in clients:
+        workers.extend([(name, client, msg)] * config.TG_DOWNLOAD_CONNECTIONS)
+    stats = {}
+    # range offset -> failed tries
+    failures = {}
+    done = 0
+    root, ext = os.path.splitext(path)
+    temp = f"{root}.temp{ext}"
+    fd = os.open(temp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    start = time.time()
+
+    async def worker(index, name, client, msg):
+        nonlocal done
+        conn = stats.setdefault(f"{name} #{index}", {"bytes": 0, "seconds": 0})
+        while True:
+            try:
+                offset, limit = ranges.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            began = time.time()
+            position = offset * CHUNK
+            received = 0
+            try:
+                async for chunk in client.stream_media(msg, offset=offset, limit=limit):
+                    await loop.run_in_executor(
+                        None, os.pwrite, fd, chunk, position + received
+                    )
+                    received += len(chunk)
+                    done += len(chunk)
+                    if progress:
+                        await progress(done, size)
+            except Exception as e:
+                LOGGER(__name__).warning(f"{name} failed a range of {path}: {e}")
+                done -= received
+                failures[offset] = failures.get(offset, 0) + 1
+                # back to the queue, this or another connection takes it after the wait
+                ranges.put_nowait((offset, limit))
+                if failures[offset] > RANGE_RETRIES:
+                    # left in the queue, the download is reported incomplete
+                    return
+                if isinstance(e, FloodWait):
+                    await asyncio.sleep(int(e.value))
+                else:
+                    await asyncio.sleep(failures[offset])
+                continue
+            conn["bytes"] += received
+            conn["seconds"] += time.time() - began
+
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+        await asyncio.gather(
+            *[worker(i, *client) for i, client in enumerate(workers)]
+        )
+        if not ranges.empty() or done != size:
+            raise IOError(f"Parallel download of {path} is incomplete")
+    except BaseException:
+        os.close(fd)
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    os.close(fd)
+    os.replace(temp, path)
+    elapsed = time.time() - start
+    for conn, info in stats.items():
+        info["speed"] = info["bytes"] / info["seconds"] if info["seconds"] else 0
+        LOGGER(__name__).info(
+            f"{conn} : {convert_bytes(info['bytes'])} at {convert_bytes(info['speed'])}/s"
+        )
+    LOGGER(__name__).info(
+        f"Downloaded {os.path.basename(path)} : {convert_bytes(size)} in "
+        f"{round(elapsed, 2)}s over {len(workers)} connections"
+    )
+    return {"bytes": size, "seconds": elapsed, "connections": stats}
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import re
+import secrets
+import socket
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+from AnonXMusic import app
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.mediacache import media_cache
+from AnonXMusic.utils.ttlcache import TTLCache
+
+# bytes handed to a player per write
+CHUNK = 1024 * 1024
+# seconds a played url stays valid after its last request, a player opens it
+# several times (probe, audio and video inputs) and reconnects to seek
+SERVE_TTL = 3600
+
+# final file path -> telegram media still being received into it
+transfers: Dict[str, "Transfer"] = {}
+# url token -> media served on the loopback endpoint, also once it is complete
+served = TTLCache(SERVE_TTL)
+# task starting the loopback endpoint, see _serve()
+_server = None
+
+
+class Transfer:
+    """Receives a telegram media into a growing file which can be played at once.
+
+    Players read it over a loopback http url with range support, which they
+    may open as often as they like while the media arrives. The finished file
+    is moved to `path` and kept in the media cache for seeking and replays.
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        root, ext = os.path.splitext(path)
+        self.temp = f"{root}.temp{ext}"
+        self.received = 0
+        self.failed = False
+        self.done = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.task = None
+        # chats which asked for this media, see leave()
+        self.users = 0
+        self.token = secrets.token_urlsafe(16)
+        # exists from the start so a player can open it before any chunk arrived
+        open(self.temp, "wb").close()
+
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def leave(self):
+        """Drops a chat which gave up waiting, the last one to leave stops the transfer."""
+        self.users -= 1
+        if self.users <= 0 and self.task is not None:
+            self.task.cancel()
+
+    async def run(self, message, progress=None):
+        try:
+            with open(self.temp, "wb") as f:
+                async for chunk in app.stream_media(message):
+                    f.write(chunk)
+                    f.flush()
+                    self.received += len(chunk)
+                    self._notify()
+                    if progress:
+                        await progress(self.received, self.size)
+            os.replace(self.temp, self.path)
+            media_cache.add(self.path)
+        except BaseException as e:
+            self.failed = True
+            LOGGER(__name__).warning(f"Telegram transfer of {self.path} failed: {e}")
+            try:
+                os.remove(self.temp)
+            except OSError:
+                pass
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            transfers.pop(self.path, None)
+            self.done.set()
+            self._notify()
+
+    async def buffered(self, size: int) -> bool:
+        """Waits until `size` bytes arrived or the transfer ended."""
+        while not self.done.is_set() and self.received < size:
+            await self.changed.wait()
+        return not self.failed
+
+    def open(self):
+        """Opens the media at its first byte, wherever it is stored right now."""
+        # the temp file stays readable through this handle after the rename
+        try:
+            return open(self.temp, "rb")
+        except FileNotFoundError:
+            return open(self.path, "rb")
+
+
+def _range(header: str, size: int) -> Tuple[int, int]:
+    """First and last byte asked for by a Range header, the whole media without one."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or not any(match.groups()):
+        return 0, size - 1
+    first, last = match.groups()
+    if not first:
+        return max(size - int(last), 0), size - 1
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+async def _handle(request: web.Request) -> web.StreamResponse:
+    token = request.match_info["token"]
+    transfer = served.get(token)
+    if transfer is None or transfer.failed:
+        raise web.HTTPNotFound()
+    served.set(token, transfer)
+    size = transfer.size
+    first, last = _range(request.headers.get("Range", ""), size)
+    if first >= size:
+        raise web.HTTPRequestRangeNotSatisfiable(
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    try:
+        source = transfer.open()
+    except FileNotFoundError:
+        raise web.HTTPNotFound()
+    try:
+        response = web.StreamResponse(
+            status=206 if request.headers.get("Range") else 200,
+            headers={
+                "Accept-Ranges": "bytes",
+                "Content-Type": "application/octet-stream",
+            },
+        )
+        if response.status == 206:
+            response.headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response.content_length = last - first + 1
+        await response.prepare(request)
+        if request.method == "HEAD":
+            return response
+        source.seek(first)
+        position = first
+        while position <= last:
+            # the reader waits here for the bytes still on their way
+            if not await transfer.buffered(position + 1):
+                break
+            data = source.read(min(CHUNK, last - position + 1))
+            if not data:
+                if transfer.done.is_set():
+                    break
+                continue
+            await response.write(data)
+            position += len(data)
+        return response
+    except ConnectionResetError:
+        # player stopped or skipped before the end
+        return response
+    finally:
+        source.close()
+
+
+async def _start() -> str:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = web.Application()
+    server.router.add_get("/{token}", _handle)
+    runner = web.AppRunner(server, access_log=None)
+    await runner.setup()
+    await web.SockSite(runner, sock).start()
+    return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+async def _serve() -> str:
+    """Base url of the loopback endpoint, started by the first stream."""
+    global _server
+    if _server is None:
+        _server = asyncio.ensure_future(_start())
+    try:
+        return await asyncio.shield(_server)
+    except Exception:
+        if _server.done():
+            _server = None
+        raise
+
+
+def start(message, path: str, size: int, progress=None) -> Transfer:
+    transfer = transfers.get(path)
+    if transfer is None:
+        transfer = Transfer(path, size)
+        transfers[path] = transfer
+        transfer.task = asyncio.ensure_future(transfer.run(message, progress))
+    transfer.users += 1
+    return transfer
+
+
+async def playable(path) -> str:
+    """Returns what a player should read for `path`, a loopback url while it is still arriving."""
+    transfer = transfers.get(str(path))
+    if transfer is None:
+        return path
+    base = await _serve()
+    served.set(transfer.token, transfer)
+    return f"{base}/{transfer.token}"
+
+
+async def complete(path) -> str:
+    """Waits until `path` is fully received, for players which need to seek."""
+    transfer = transfers.get(str(path))
+    if transfer is not None:
+        await transfer.done.wait()
+    return path
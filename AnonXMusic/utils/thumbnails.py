@@ -1,15 +1,28 @@
+import asyncio
+import io
 import os
 import re
+import time
+from typing import Dict
 
-import aiofiles
-import aiohttp
-from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
 from unidecode import unidecode
 from youtubesearchpython.__future__ import VideosSearch
 
 from AnonXMusic import app
+import config
+from AnonXMusic.core.http import http
+from AnonXMusic.utils.mediacache import MediaCache
+from AnonXMusic.utils.render import font, register_template, render, template
 from config import YOUTUBE_IMG_URL
 
+# videoid -> thumbnail being generated, shared by every chat asking for it
+inflight: Dict[str, asyncio.Future] = {}
+metrics = {"rendered": 0, "failed": 0, "deduped": 0, "total_ms": 0.0, "max_ms": 0.0}
+thumb_cache = MediaCache(
+    "thumbs", config.THUMB_CACHE_SIZE, "lru", max_files=config.THUMB_CACHE_FILES
+)
+
 
 def changeImageSize(maxWidth, maxHeight, image):
     widthRatio = maxWidth / image.size[0]
@@ -29,10 +42,81 @@ def clear(text):
     return title.strip()
 
 
-async def get_thumb(videoid):
-    if os.path.isfile(f"cache/{videoid}.png"):
-        return f"cache/{videoid}.png"
+def overlay() -> Image.Image:
+    """The parts of a thumbnail which are the same for every video."""
+    layer = Image.new("RGBA", (1280, 720), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    draw.line(
+        [(55, 660), (1220, 660)],
+        fill="white",
+        width=5,
+        joint="curve",
+    )
+    draw.ellipse(
+        [(918, 648), (942, 672)],
+        outline="white",
+        fill="white",
+        width=15,
+    )
+    draw.text(
+        (36, 685),
+        "00:00",
+        (255, 255, 255),
+        font=font("font2", 30),
+    )
+    return layer
+
+
+register_template("thumb_overlay", overlay)
+
+
+def thumb_path(videoid) -> str:
+    ext = "webp" if config.THUMB_FORMAT == "webp" else "jpg"
+    return os.path.join("thumbs", f"{videoid}.{ext}")
 
+
+def draw_thumb(data: bytes, path: str, name, title, duration, views, channel) -> float:
+    """Draws the thumbnail of a video, runs in the render pool.
+
+    Returns the time spent rendering in milliseconds.
+    """
+    start = time.perf_counter()
+    youtube = Image.open(io.BytesIO(data))
+    image1 = changeImageSize(1280, 720, youtube)
+    image2 = image1.convert("RGBA")
+    background = image2.filter(filter=ImageFilter.BoxBlur(10))
+    enhancer = ImageEnhance.Brightness(background)
+    background = enhancer.enhance(0.5)
+    background.alpha_composite(template("thumb_overlay"))
+    draw = ImageDraw.Draw(background)
+    arial = font("font2", 30)
+    draw.text((1110, 8), unidecode(name), fill="white", font=arial)
+    draw.text(
+        (55, 560),
+        f"{channel} | {views[:23]}",
+        (255, 255, 255),
+        font=arial,
+    )
+    draw.text(
+        (57, 600),
+        clear(title),
+        (255, 255, 255),
+        font=font("font", 30),
+    )
+    draw.text(
+        (1185, 685),
+        f"{duration[:23]}",
+        (255, 255, 255),
+        font=arial,
+    )
+    # written aside first so get_thumb never returns a half written file
+    fmt = "WEBP" if path.endswith(".webp") else "JPEG"
+    background.convert("RGB").save(f"{path}.temp", format=fmt, quality=85)
+    os.replace(f"{path}.temp", path)
+    return (time.perf_counter() - start) * 1000
+
+
+async def _get_thumb(videoid):
     url = f"https://www.youtube.com/watch?v={videoid}"
     try:
         results = VideosSearch(url, limit=1)
@@ -57,65 +141,57 @@ async def get_thumb(videoid):
             except:
                 channel = "Unknown Channel"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(thumbnail) as resp:
-                if resp.status == 200:
-                    f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
-                    await f.write(await resp.read())
-                    await f.close()
-
-        youtube = Image.open(f"cache/thumb{videoid}.png")
-        image1 = changeImageSize(1280, 720, youtube)
-        image2 = image1.convert("RGBA")
-        background = image2.filter(filter=ImageFilter.BoxBlur(10))
-        enhancer = ImageEnhance.Brightness(background)
-        background = enhancer.enhance(0.5)
-        draw = ImageDraw.Draw(background)
-        arial = ImageFont.truetype("AnonXMusic/assets/font2.ttf", 30)
-        font = ImageFont.truetype("AnonXMusic/assets/font.ttf", 30)
-        draw.text((1110, 8), unidecode(app.name), fill="white", font=arial)
-        draw.text(
-            (55, 560),
-            f"{channel} | {views[:23]}",
-            (255, 255, 255),
-            font=arial,
-        )
-        draw.text(
-            (57, 600),
-            clear(title),
-            (255, 255, 255),
-            font=font,
+        resp = await http.get(thumbnail)
+        if resp.status != 200:
+            raise ValueError(f"Thumbnail of {videoid} returned {resp.status}")
+        path = thumb_path(videoid)
+        elapsed = await render(
+            draw_thumb,
+            await resp.read(),
+            path,
+            app.name,
+            title,
+            duration,
+            views,
+            channel,
         )
-        draw.line(
-            [(55, 660), (1220, 660)],
-            fill="white",
-            width=5,
-            joint="curve",
-        )
-        draw.ellipse(
-            [(918, 648), (942, 672)],
-            outline="white",
-            fill="white",
-            width=15,
-        )
-        draw.text(
-            (36, 685),
-            "00:00",
-            (255, 255, 255),
-            font=arial,
-        )
-        draw.text(
-            (1185, 685),
-            f"{duration[:23]}",
-            (255, 255, 255),
-            font=arial,
-        )
-        try:
-            os.remove(f"cache/thumb{videoid}.png")
-        except:
-            pass
-        background.save(f"cache/{videoid}.png")
-        return f"cache/{videoid}.png"
+        metrics["rendered"] += 1
+        metrics["total_ms"] += elapsed
+        metrics["max_ms"] = max(metrics["max_ms"], elapsed)
+        thumb_cache.add(path)
+        return path
     except Exception as e:
+        metrics["failed"] += 1
         print(e)
         return YOUTUBE_IMG_URL
+
+
+def cached_thumb(videoid):
+    """Returns the stored thumbnail of a video without touching the disk, or None."""
+    path = thumb_path(videoid)
+    return path if thumb_cache.contains(path) else None
+
+
+async def get_thumb(videoid):
+    path = thumb_path(videoid)
+    if thumb_cache.lookup(path, verify=False):
+        return path
+    task = inflight.get(videoid)
+    if task is None:
+        task = asyncio.ensure_future(_get_thumb(videoid))
+        inflight[videoid] = task
+        task.add_done_callback(lambda _: inflight.pop(videoid, None))
+    else:
+        metrics["deduped"] += 1
+    return await asyncio.shield(task)
+
+
+def thumb_stats() -> dict:
+    rendered = metrics["rendered"]
+    return {
+        "rendered": rendered,
+        "failed": metrics["failed"],
+        "deduped": metrics["deduped"],
+        "avg_ms": round(metrics["total_ms"] / rendered, 1) if rendered else 0,
+        "max_ms": round(metrics["max_ms"], 1),
+    }
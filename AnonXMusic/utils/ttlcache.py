@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Tuple
+
+
+class TTLCache:
+    """A small in-memory cache whose entries expire `ttl` seconds after being set.
+
+    Holds at most `maxsize` entries, dropping the least recently used first.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.get(key)
+        if item is None:
+            return default
+        if item[0] < time.monotonic():
+            del self.data[key]
+            return default
+        self.data.move_to_end(key)
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        self.data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.pop(key, None)
+        return default if item is None else item[1]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        now = time.monotonic()
+        for key, (expires, value) in list(self.data.items()):
+            if expires >= now:
+                yield key, value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.data)
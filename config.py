@@ -61,6 +61,45 @@ TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 1073741824))
 # Checkout https://www.gbmb.org/mb-to-bytes for converting mb to bytes
 
 
+# Disk budget (in bytes) for downloaded media kept between plays and restarts
+CACHE_SIZE_LIMIT = int(getenv("CACHE_SIZE_LIMIT", 5368709120))
+# Eviction policy of the media cache once the budget is exceeded: lru or lfu
+CACHE_EVICTION = getenv("CACHE_EVICTION", "lru")
+
+# How youtube and telegram tracks start playing:
+# download - wait for the file to be downloaded before joining (default)
+# direct - start playing at once while the file downloads in background
+STREAM_MODE = getenv("STREAM_MODE", "download").lower()
+
+# Bytes of a telegram media received before it starts playing in direct mode
+TG_STREAM_BUFFER = int(getenv("TG_STREAM_BUFFER", 4194304))
+
+# Telegram media larger than this is downloaded over several connections at once
+TG_PARALLEL_MIN_SIZE = int(getenv("TG_PARALLEL_MIN_SIZE", 20971520))
+TG_DOWNLOAD_CONNECTIONS = int(getenv("TG_DOWNLOAD_CONNECTIONS", 4))
+# Also use assistants which are not streaming anywhere for parallel downloads
+TG_DOWNLOAD_ASSISTANTS = getenv("TG_DOWNLOAD_ASSISTANTS", "False").lower() == "true"
+
+# Processes rendering queue cards and thumbnails
+RENDER_WORKERS = int(getenv("RENDER_WORKERS", 2))
+
+# Rendered thumbnails are saved as jpeg or webp and kept under these budgets
+THUMB_FORMAT = getenv("THUMB_FORMAT", "jpeg").lower()
+THUMB_CACHE_SIZE = int(getenv("THUMB_CACHE_SIZE", 104857600))
+THUMB_CACHE_FILES = int(getenv("THUMB_CACHE_FILES", 2000))
+
+# Retries for failed youtube downloads and fragments fetched in parallel per download
+YT_DOWNLOAD_RETRIES = int(getenv("YT_DOWNLOAD_RETRIES", 10))
+YT_CONCURRENT_FRAGMENTS = int(getenv("YT_CONCURRENT_FRAGMENTS", 4))
+
+# Queues, loop counts and playback positions are saved every CHECKPOINT_INTERVAL
+# seconds and the calls resumed after a restart or crash, checkpoints older than
+# RESUME_MAX_AGE seconds are dropped instead
+RESUME_PLAYBACK = getenv("RESUME_PLAYBACK", "True").lower() == "true"
+CHECKPOINT_INTERVAL = int(getenv("CHECKPOINT_INTERVAL", 15))
+RESUME_MAX_AGE = int(getenv("RESUME_MAX_AGE", 1800))
+
+
 # Get your pyrogram v2 session from @StringFatherBot on Telegram
 STRING1 = getenv("STRING_SESSION", None)
 STRING2 = getenv("STRING_SESSION2", None)
@@ -73,7 +112,7 @@ BANNED_USERS = filters.user()
 adminlist = {}
 lyrical = {}
 votemode = {}
-autoclean = []
+autoclean = {}
 confirmer = {}
 
 
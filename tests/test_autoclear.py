@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from AnonXMusic.core.queue import Track
+from AnonXMusic.utils.stream import autoclear
+from config import autoclean
+
+
+@pytest.fixture(autouse=True)
+def clean_refs():
+    autoclean.clear()
+    yield
+    autoclean.clear()
+
+
+def test_retain_and_release_count_references():
+    autoclear.retain("a.mp3")
+    autoclear.retain("a.mp3")
+    assert autoclean["a.mp3"] == 2
+    assert not autoclear.release("a.mp3")
+    assert autoclear.release("a.mp3")
+    assert "a.mp3" not in autoclean
+
+
+def test_swap_file_moves_the_reference():
+    t = Track(file="vid_abc")
+    autoclear.retain("vid_abc")
+    autoclear.swap_file(t, "abc.m4a")
+    assert t["file"] == "abc.m4a"
+    assert autoclean == {"abc.m4a": 1}
+    autoclear.swap_file(t, "abc.m4a")
+    assert autoclean == {"abc.m4a": 1}
+
+
+def test_auto_clean_removes_a_file_once_unreferenced(tmp_path):
+    path = tmp_path / "a.mp3"
+    path.write_bytes(b"x")
+    first, second = Track(file=str(path)), Track(file=str(path))
+    autoclear.retain(str(path))
+    autoclear.retain(str(path))
+    asyncio.run(autoclear.auto_clean(first))
+    assert path.exists()
+    asyncio.run(autoclear.auto_clean(second))
+    assert not path.exists()
+    assert not autoclean
+
+
+def test_auto_clean_releases_the_pinned_download():
+    t = Track(file="vid_abc")
+    autoclear.retain("vid_abc")
+    # the reference YouTube.download takes for the background download
+    autoclear.retain("downloads/abc_audio.m4a")
+    autoclear.pin(t, "downloads/abc_audio.m4a")
+    asyncio.run(autoclear.auto_clean(t))
+    assert not autoclean
+
+
+def test_clean_queue_releases_every_track(tmp_path):
+    files = [tmp_path / f"{i}.mp3" for i in range(3)]
+    for file in files:
+        file.write_bytes(b"x")
+        autoclear.retain(str(file))
+    asyncio.run(autoclear.clean_queue([Track(file=str(f)) for f in files]))
+    assert not autoclean
+    assert not any(file.exists() for file in files)
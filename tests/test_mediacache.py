@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from AnonXMusic.utils.mediacache import MediaCache
+from config import autoclean
+
+
+@pytest.fixture(autouse=True)
+def clean_refs():
+    autoclean.clear()
+    yield
+    autoclean.clear()
+
+
+def put(cache: MediaCache, name: str, size: int = 10) -> str:
+    path = os.path.join(cache.path, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    cache.add(path)
+    return path
+
+
+def make(tmp_path, limit: int, policy: str = "lru") -> MediaCache:
+    cache = MediaCache(str(tmp_path), limit, policy)
+    cache.load()
+    return cache
+
+
+def test_evicts_the_least_recently_used(tmp_path):
+    cache = make(tmp_path, 30)
+    a = put(cache, "a")
+    b = put(cache, "b")
+    put(cache, "c")
+    cache.entries["a"]["atime"] = time.time() + 1
+    put(cache, "d")
+    assert os.path.exists(a)
+    assert not os.path.exists(b)
+    assert cache.size == 30
+
+
+def test_evicts_the_least_frequently_used(tmp_path):
+    cache = make(tmp_path, 30, "lfu")
+    a = put(cache, "a")
+    b = put(cache, "b")
+    put(cache, "c")
+    assert cache.lookup(a)
+    assert cache.lookup(os.path.join(cache.path, "c"))
+    put(cache, "d")
+    assert os.path.exists(a)
+    assert not os.path.exists(b)
+
+
+def test_never_evicts_a_queued_file(tmp_path):
+    cache = make(tmp_path, 20)
+    a = put(cache, "a")
+    autoclean[a] = 1
+    b = put(cache, "b")
+    put(cache, "c")
+    assert os.path.exists(a)
+    assert not os.path.exists(b)
+
+
+def test_misses_are_counted_when_a_file_is_added(tmp_path):
+    cache = make(tmp_path, 100)
+    path = os.path.join(cache.path, "a")
+    assert not cache.lookup(path)
+    assert cache.misses == 0
+    put(cache, "a")
+    assert cache.lookup(path)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["hit_rate"] == 50
+
+
+def test_lookup_drops_a_file_removed_behind_its_back(tmp_path):
+    cache = make(tmp_path, 100)
+    path = put(cache, "a")
+    os.remove(path)
+    assert not cache.lookup(path)
+    assert not cache.contains(path)
+    assert cache.size == 0
+
+
+def test_index_survives_a_restart(tmp_path):
+    cache = make(tmp_path, 100)
+    path = put(cache, "a")
+    cache.lookup(path)
+    cache.save()
+    again = make(tmp_path, 100)
+    assert again.contains(path)
+    assert again.entries["a"]["hits"] == 1
+    assert again.hits == 1
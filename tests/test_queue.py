@@ -0,0 +1,106 @@
+import pytest
+
+from AnonXMusic.core.queue import ChatQueue, Track
+
+
+def track(title: str) -> Track:
+    return Track(title=title, file=f"{title}.mp3", vidid=title, seconds=60)
+
+
+def titles(queue: ChatQueue) -> list:
+    return [t["title"] for t in queue]
+
+
+def test_track_reads_like_a_dict():
+    t = track("a")
+    assert t["title"] == "a"
+    assert t.get("old_dur") is None
+    assert t.get("old_dur", "3:00") == "3:00"
+    assert "file" in t
+    assert "old_dur" not in t
+    t["speed"] = 1.5
+    assert t["speed"] == 1.5
+
+
+def test_track_rejects_unknown_fields():
+    with pytest.raises(KeyError):
+        Track(title="a", nope=1)
+    t = track("a")
+    with pytest.raises(KeyError):
+        t["nope"]
+    with pytest.raises(KeyError):
+        t["nope"] = 1
+
+
+def test_track_to_dict_skips_unset_fields():
+    assert track("a").to_dict() == {
+        "title": "a",
+        "file": "a.mp3",
+        "vidid": "a",
+        "seconds": 60,
+    }
+
+
+def test_every_change_moves_the_version():
+    queue = ChatQueue()
+    versions = [queue.version]
+    queue.append(track("a"))
+    versions.append(queue.version)
+    queue.extend([track("b"), track("c")])
+    versions.append(queue.version)
+    queue.insert(1, track("d"))
+    versions.append(queue.version)
+    queue.push_front(track("e"))
+    versions.append(queue.version)
+    queue.pop()
+    versions.append(queue.version)
+    queue.remove(queue[1])
+    versions.append(queue.version)
+    queue.clear()
+    versions.append(queue.version)
+    assert versions == sorted(set(versions))
+
+
+def test_advance_and_pop_front():
+    queue = ChatQueue([track("a"), track("b"), track("c")])
+    assert queue.advance()["title"] == "a"
+    assert queue.pop(0)["title"] == "b"
+    assert titles(queue) == ["c"]
+    queue.advance()
+    with pytest.raises(IndexError):
+        queue.advance()
+
+
+def test_pop_from_the_middle():
+    queue = ChatQueue([track("a"), track("b"), track("c")])
+    assert queue.pop(1)["title"] == "b"
+    assert titles(queue) == ["a", "c"]
+
+
+def test_skip_n_stops_at_the_end():
+    queue = ChatQueue([track("a"), track("b"), track("c")])
+    assert [t["title"] for t in queue.skip_n(2)] == ["a", "b"]
+    assert [t["title"] for t in queue.skip_n(5)] == ["c"]
+    assert not queue
+
+
+def test_shuffle_tail_keeps_the_playing_track():
+    queue = ChatQueue([track(str(i)) for i in range(20)])
+    head = queue[0]
+    version = queue.version
+    assert queue.shuffle_tail()
+    assert queue[0] is head
+    assert sorted(titles(queue), key=int) == [str(i) for i in range(20)]
+    assert queue.version > version
+    assert not ChatQueue([track("a")]).shuffle_tail()
+
+
+def test_snapshot_is_copied_once_per_version():
+    queue = ChatQueue([track("a"), track("b")])
+    first = queue.snapshot()
+    assert queue.snapshot() is first
+    queue.append(track("c"))
+    second = queue.snapshot()
+    assert second is not first
+    assert [t["title"] for t in second] == ["a", "b", "c"]
+    assert len(first) == 2